@@ -1,5 +1,20 @@
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        from . import signals  # noqa: F401
+        from .shopping_cart import FONT_NAME
+
+        pdfmetrics.registerFont(TTFont(
+            FONT_NAME,
+            os.path.join(settings.BASE_DIR, 'data', 'FreeSans.ttf')
+        ))
@@ -0,0 +1,105 @@
+import hashlib
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from users.models import User
+
+from .cache import LRUCache, bump_version, is_shared
+
+USER_VERSION_KEY = 'auth_user_version:{user_id}'
+
+TokenEntry = namedtuple(
+    'TokenEntry', ('user_values', 'token_values', 'version', 'expires')
+)
+
+
+def get_values(instance):
+    return tuple(
+        getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+    )
+
+
+def from_values(model, values):
+    return model.from_db(
+        None,
+        [field.attname for field in model._meta.concrete_fields],
+        values,
+    )
+
+
+def get_shared_cache():
+    if not settings.AUTH_CACHE_ALIAS:
+        return None
+    cache = caches[settings.AUTH_CACHE_ALIAS]
+    return cache if is_shared(cache) else None
+
+
+def get_user_version(user_id):
+    return get_shared_cache().get(
+        USER_VERSION_KEY.format(user_id=user_id), 0
+    )
+
+
+def invalidate_user(user_id):
+    cache = get_shared_cache()
+    if cache is not None:
+        bump_version(cache, USER_VERSION_KEY.format(user_id=user_id))
+
+
+class TokenCache:
+    def __init__(self):
+        self.local = LRUCache(settings.AUTH_CACHE_LOCAL_SIZE)
+
+    @property
+    def shared(self):
+        return get_shared_cache()
+
+    @staticmethod
+    def make_key(key):
+        return 'auth_token:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key, token_model):
+        cache_key = self.make_key(key)
+        entry = self.local.get(cache_key)
+        if entry is None:
+            entry = self.shared.get(cache_key)
+            if entry is not None:
+                self.local.set(cache_key, entry)
+        if entry is None or entry.expires < time.time():
+            return None
+        user = from_values(User, entry.user_values)
+        if entry.version != get_user_version(user.pk):
+            return None
+        token = from_values(token_model, entry.token_values)
+        token.user = user
+        return user, token
+
+    def set(self, key, user, token, version):
+        cache_key = self.make_key(key)
+        entry = TokenEntry(
+            user_values=get_values(user),
+            token_values=get_values(token),
+            version=version,
+            expires=time.time() + settings.AUTH_CACHE_TIMEOUT,
+        )
+        self.local.set(cache_key, entry)
+        self.shared.set(cache_key, entry, settings.AUTH_CACHE_TIMEOUT)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        if token_cache.shared is None:
+            return super().authenticate_credentials(key)
+        cached = token_cache.get(key, self.get_model())
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, get_user_version(user.pk))
+        return user, token
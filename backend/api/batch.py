@@ -0,0 +1,190 @@
+from http import HTTPStatus
+
+from django.db import connection, transaction
+from django.db.models import Exists
+from recipes import feed, shopping_list
+from recipes.counters import change_counter
+from recipes.models import Favorite, Recipe, Shoppingcart
+from rest_framework.exceptions import APIException
+from users.models import Subscribe, User
+
+from .shopping_cart import invalidate_cart_pdf
+
+CREATED = 'created'
+EXISTS = 'exists'
+DELETED = 'deleted'
+MISSING = 'missing'
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+
+
+class BatchConflict(APIException):
+    status_code = HTTPStatus.CONFLICT
+    default_detail = 'Данные изменились во время запроса, повторите его'
+
+
+def lock_user(user_id, relations=None):
+    users = User.objects.select_for_update().filter(pk=user_id)
+    if relations is None:
+        return bool(list(users.values_list('pk', flat=True)))
+    return bool(users.annotate(
+        found=Exists(relations)
+    ).values_list('found', flat=True).first())
+
+
+class RelationBatch:
+    model = None
+    target_model = None
+    target_field = None
+
+    def __init__(self, user):
+        self.user = user
+
+    def get_relations(self, ids):
+        return self.model.objects.filter(user=self.user, **{
+            f'{self.target_field}_id__in': ids
+        })
+
+    def get_found(self, ids):
+        return set(self.target_model.objects.filter(
+            id__in=ids
+        ).values_list('id', flat=True))
+
+    def delete_relations(self, ids):
+        meta = self.model._meta
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {quote_name(meta.db_table)} '
+                f'WHERE {quote_name(meta.get_field("user").column)} = %s '
+                f'AND {quote_name(meta.get_field(self.target_field).column)} '
+                f'IN ({", ".join(["%s"] * len(ids))})',
+                (self.user.pk, *ids),
+            )
+            return cursor.rowcount
+
+    def get_existing(self, ids):
+        return set(self.get_relations(ids).values_list(
+            f'{self.target_field}_id', flat=True
+        ))
+
+    def is_allowed(self, target_id):
+        return True
+
+    def get_add_status(self, target_id, found, existing):
+        if target_id not in found:
+            return NOT_FOUND
+        if not self.is_allowed(target_id):
+            return FORBIDDEN
+        return EXISTS if target_id in existing else CREATED
+
+    def get_remove_status(self, target_id, found, existing):
+        if target_id not in found:
+            return NOT_FOUND
+        return DELETED if target_id in existing else MISSING
+
+    @transaction.atomic
+    def apply(self, add, remove):
+        lock_user(self.user.pk)
+        found = self.get_found(add + remove)
+        existing = self.get_existing(found)
+        results = [
+            {'id': target_id, 'action': 'add',
+             'status': self.get_add_status(target_id, found, existing)}
+            for target_id in add
+        ] + [
+            {'id': target_id, 'action': 'remove',
+             'status': self.get_remove_status(target_id, found, existing)}
+            for target_id in remove
+        ]
+        created = [
+            result['id'] for result in results if result['status'] == CREATED
+        ]
+        deleted = [
+            result['id'] for result in results if result['status'] == DELETED
+        ]
+        if created:
+            self.model.objects.bulk_create(
+                (
+                    self.model(user=self.user, **{
+                        f'{self.target_field}_id': target_id
+                    })
+                    for target_id in created
+                ),
+                ignore_conflicts=True,
+            )
+            self.created(created)
+        if deleted:
+            if self.delete_relations(deleted) != len(deleted):
+                raise BatchConflict
+            self.deleted(deleted)
+        return results
+
+    def created(self, target_ids):
+        pass
+
+    def deleted(self, target_ids):
+        pass
+
+
+class FavoriteBatch(RelationBatch):
+    model = Favorite
+    target_model = Recipe
+    target_field = 'recipe'
+
+    def created(self, recipe_ids):
+        change_counter(
+            Recipe.objects.filter(pk__in=recipe_ids), 'favorites_count', 1
+        )
+
+    def deleted(self, recipe_ids):
+        change_counter(
+            Recipe.objects.filter(pk__in=recipe_ids), 'favorites_count', -1
+        )
+
+
+class CartBatch(RelationBatch):
+    model = Shoppingcart
+    target_model = Recipe
+    target_field = 'recipe'
+
+    def created(self, recipe_ids):
+        change_counter(
+            Recipe.objects.filter(pk__in=recipe_ids), 'cart_count', 1
+        )
+        shopping_list.add_recipes(self.user.pk, recipe_ids)
+        invalidate_cart_pdf((self.user.pk,))
+
+    def deleted(self, recipe_ids):
+        change_counter(
+            Recipe.objects.filter(pk__in=recipe_ids), 'cart_count', -1
+        )
+        shopping_list.remove_recipes(self.user.pk, recipe_ids)
+        invalidate_cart_pdf((self.user.pk,))
+
+
+class SubscriptionBatch(RelationBatch):
+    model = Subscribe
+    target_model = User
+    target_field = 'author'
+
+    def is_allowed(self, author_id):
+        return author_id != self.user.pk
+
+    def change_counters(self, author_ids, delta):
+        change_counter(
+            User.objects.filter(pk__in=author_ids), 'subscribers_count', delta
+        )
+        change_counter(
+            User.objects.filter(pk=self.user.pk),
+            'following_count',
+            delta * len(author_ids),
+        )
+
+    def created(self, author_ids):
+        self.change_counters(author_ids, 1)
+        feed.follow(self.user.pk, author_ids)
+
+    def deleted(self, author_ids):
+        self.change_counters(author_ids, -1)
+        feed.unfollow(self.user.pk, author_ids)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.response import Response
+
+MISSING = object()
+
+
+def is_shared(cache):
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def get_local_expiry(cache, timeout):
+    if is_shared(cache):
+        return None
+    return time.monotonic() + timeout
+
+
+def is_expired(expires):
+    return expires is not None and expires < time.monotonic()
+
+
+def bump_version(cache, key):
+    if cache.add(key, 1, None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+class LRUCache:
+    def __init__(self, max_size, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                expires, value = self.entries[key]
+            except KeyError:
+                return default
+            if is_expired(expires):
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = None
+        if self.timeout is not None:
+            expires = time.monotonic() + self.timeout
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TieredCache:
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.local = LRUCache(
+            settings.CATALOGUE_CACHE_LOCAL_SIZE,
+            settings.CATALOGUE_CACHE_LOCAL_TIMEOUT,
+        )
+        self.versions = LRUCache(
+            settings.CATALOGUE_CACHE_LOCAL_SIZE,
+            settings.CATALOGUE_CACHE_LOCAL_TIMEOUT,
+        )
+
+    @property
+    def shared(self):
+        return caches[settings.CATALOGUE_CACHE_ALIAS]
+
+    def get_version_key(self, namespace):
+        return f'{self.prefix}:{namespace}:version'
+
+    def get_version(self, namespace):
+        version_key = self.get_version_key(namespace)
+        if not is_shared(self.shared):
+            return self.shared.get(version_key, 0)
+        version = self.versions.get(version_key)
+        if version is None:
+            version = self.shared.get(version_key, 0)
+            self.versions.set(version_key, version)
+        return version
+
+    def make_key(self, namespace, key):
+        version = self.get_version(namespace)
+        return f'{self.prefix}:{namespace}:{version}:{key}'
+
+    def get(self, namespace, key):
+        full_key = self.make_key(namespace, key)
+        if not is_shared(self.shared):
+            return full_key, self.shared.get(full_key)
+        value = self.local.get(full_key, MISSING)
+        if value is MISSING:
+            value = self.shared.get(full_key, MISSING)
+            if value is MISSING:
+                return full_key, None
+            self.local.set(full_key, value)
+        return full_key, value
+
+    def set(self, full_key, value):
+        if not is_shared(self.shared):
+            self.shared.set(
+                full_key, value, settings.CATALOGUE_CACHE_LOCAL_TIMEOUT
+            )
+            return
+        self.local.set(full_key, value)
+        self.shared.set(full_key, value, settings.CATALOGUE_CACHE_TIMEOUT)
+
+    def invalidate(self, namespace):
+        version_key = self.get_version_key(namespace)
+        bump_version(self.shared, version_key)
+        self.versions.delete(version_key)
+
+
+catalogue_cache = TieredCache('catalogue')
+
+
+def make_etag(data):
+    return quote_etag(hashlib.sha1(
+        json.dumps(data, ensure_ascii=False, default=str).encode()
+    ).hexdigest())
+
+
+class CachedCatalogueMixin:
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        full_key, entry = catalogue_cache.get(
+            self.cache_namespace, request.get_full_path()
+        )
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != HTTPStatus.OK:
+                return response
+            entry = (make_etag(response.data), response.data)
+            catalogue_cache.set(full_key, entry)
+        etag, data = entry
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(
+                status=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+            )
+        return Response(data, headers={'ETag': etag})
@@ -1,4 +1,11 @@
+from contextlib import suppress
+from http import HTTPStatus
+
+from django.db import DatabaseError, OperationalError, connection
 from rest_framework import mixins, viewsets
+from rest_framework.response import Response
+
+QUERY_CANCELED = '57014'
 
 
 class ListRetriveViewSet(mixins.ListModelMixin,
@@ -18,3 +25,34 @@ class CreateListDestroyViewSet(mixins.CreateModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
     pass
+
+
+class ListViewSet(mixins.ListModelMixin,
+                  viewsets.GenericViewSet):
+    pass
+
+
+class StatementTimeoutMixin:
+    statement_timeout = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.statement_timeout or connection.vendor != 'postgresql':
+            return super().dispatch(request, *args, **kwargs)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SET statement_timeout = %s', (self.statement_timeout,)
+            )
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            with suppress(DatabaseError), connection.cursor() as cursor:
+                cursor.execute('RESET statement_timeout')
+
+    def handle_exception(self, exc):
+        if (isinstance(exc, OperationalError)
+                and getattr(exc.__cause__, 'pgcode', None) == QUERY_CANCELED):
+            return Response(
+                {'detail': 'Превышено время выполнения запроса.'},
+                status=HTTPStatus.SERVICE_UNAVAILABLE,
+            )
+        return super().handle_exception(exc)
@@ -1,18 +1,25 @@
 from distutils.util import strtobool
 
 import django_filters
-from recipes.models import Favorite, Recipe, Shoppingcart
-from rest_framework import filters
+from django.db.models import Exists, OuterRef
+from recipes.models import Favorite, Recipe, RecipeTag, Shoppingcart
+from recipes.search import search_recipes
 
 CHOICES = (
     ('0', 'False'),
     ('1', 'True')
 )
 
+ORDERINGS = {
+    'newest': ('-pub_date', '-id'),
+    'popular': ('-favorites_count', '-pub_date', '-id'),
+    'fastest': ('cooking_time', '-pub_date', '-id'),
+}
+
 
 class RecipeFilter(django_filters.FilterSet):
-    author = django_filters.CharFilter(field_name='author__id')
-    tags = django_filters.AllValuesMultipleFilter(field_name='tags__slug')
+    author = django_filters.NumberFilter(field_name='author_id')
+    tags = django_filters.CharFilter(method='get_tags')
     is_favorited = django_filters.TypedChoiceFilter(
         choices=CHOICES,
         coerce=strtobool,
@@ -23,30 +30,46 @@ class RecipeFilter(django_filters.FilterSet):
         coerce=strtobool,
         method='get_is_in_shopping_cart'
     )
+    search = django_filters.CharFilter(method='get_search')
+    ordering = django_filters.ChoiceFilter(
+        choices=[(name, name) for name in ORDERINGS],
+        method='get_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'author', 'is_favorited', 'is_in_shopping_cart',
+            'search', 'ordering',
+        )
+
+    def get_tags(self, queryset, name, value):
+        return queryset.filter(pk__in=RecipeTag.objects.filter(
+            tag__slug__in=self.data.getlist(name),
+        ).values('recipe_id'))
 
     def get_is_favorited(self, queryset, name, value):
         if not value:
             return queryset
-        favorites = Favorite.objects.filter(user=self.request.user)
-        return queryset.filter(
-            pk__in=(favorite.recipe.pk for favorite in favorites)
-        )
+        if self.request.user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(Exists(Favorite.objects.filter(
+            user=self.request.user,
+            recipe=OuterRef('pk'),
+        )))
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         if not value:
             return queryset
-        try:
-            carts = Shoppingcart.objects.filter(user=self.request.user)
-        except Shoppingcart.DoesNotExist:
-            return queryset
-        return queryset.filter(
-            pk__in=(cart.recipe.pk for cart in carts)
-        )
+        if self.request.user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(Exists(Shoppingcart.objects.filter(
+            user=self.request.user,
+            recipe=OuterRef('pk'),
+        )))
 
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
 
-class IngredientFilter(filters.SearchFilter):
-    search_param = 'name'
+    def get_ordering(self, queryset, name, value):
+        return queryset.order_by(*ORDERINGS[value])
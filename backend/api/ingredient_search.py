@@ -0,0 +1,137 @@
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from recipes.models import Ingredient
+
+from .cache import bump_version, get_local_expiry, is_expired
+
+VERSION_KEY = 'ingredient_index_version'
+
+Snapshot = namedtuple(
+    'Snapshot', ('version', 'expires', 'keys', 'rows', 'trigrams', 'sizes')
+)
+
+
+def normalize(name):
+    return ' '.join(name.lower().replace('ё', 'е').split())
+
+
+def get_trigrams(text):
+    trigrams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        trigrams.update(
+            padded[position:position + 3]
+            for position in range(len(padded) - 2)
+        )
+    return trigrams
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+
+    def get_snapshot(self):
+        version = cache.get(VERSION_KEY, 0)
+        snapshot = self.snapshot
+        if self.is_current(snapshot, version):
+            return snapshot
+        with self.lock:
+            if not self.is_current(self.snapshot, version):
+                self.snapshot = self.build(version)
+            return self.snapshot
+
+    @staticmethod
+    def is_current(snapshot, version):
+        return (
+            snapshot is not None
+            and snapshot.version == version
+            and not is_expired(snapshot.expires)
+        )
+
+    def build(self, version):
+        rows = sorted(
+            (normalize(name), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        trigrams = {}
+        sizes = array('H')
+        for position, row in enumerate(rows):
+            row_trigrams = get_trigrams(row[0])
+            sizes.append(len(row_trigrams))
+            for trigram in row_trigrams:
+                trigrams.setdefault(trigram, array('I')).append(position)
+        return Snapshot(
+            version=version,
+            expires=get_local_expiry(
+                cache, settings.INGREDIENT_INDEX_LOCAL_TIMEOUT
+            ),
+            keys=[row[0] for row in rows],
+            rows=[row[1:] for row in rows],
+            trigrams=trigrams,
+            sizes=sizes,
+        )
+
+    def invalidate(self):
+        self.snapshot = None
+        bump_version(cache, VERSION_KEY)
+
+    def search(self, query, limit):
+        snapshot = self.get_snapshot()
+        query = normalize(query)
+        if not query:
+            return [self.as_dict(row) for row in snapshot.rows[:limit]]
+        found = []
+        seen = set()
+        position = bisect_left(snapshot.keys, query)
+        while (
+            position < len(snapshot.keys)
+            and snapshot.keys[position].startswith(query)
+            and len(found) < limit
+        ):
+            found.append(position)
+            seen.add(position)
+            position += 1
+        if len(found) < limit:
+            found.extend(
+                self.fuzzy(snapshot, query, seen)[:limit - len(found)]
+            )
+        return [self.as_dict(snapshot.rows[position]) for position in found]
+
+    def fuzzy(self, snapshot, query, seen):
+        query_trigrams = get_trigrams(query)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(snapshot.trigrams.get(trigram, ()))
+        substring, similar = [], []
+        for position, count in shared.items():
+            if position in seen:
+                continue
+            key = snapshot.keys[position]
+            offset = key.find(query)
+            if offset != -1:
+                substring.append((offset, key, position))
+                continue
+            similarity = count / (
+                len(query_trigrams) + snapshot.sizes[position] - count
+            )
+            if similarity >= settings.INGREDIENT_SEARCH_SIMILARITY:
+                similar.append((-similarity, key, position))
+        return [
+            position for *_, position in sorted(substring) + sorted(similar)
+        ]
+
+    @staticmethod
+    def as_dict(row):
+        pk, name, measurement_unit = row
+        return {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+
+
+ingredient_index = IngredientIndex()
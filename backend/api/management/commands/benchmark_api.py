@@ -0,0 +1,264 @@
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from fnmatch import fnmatch
+
+from api.cache import catalogue_cache
+from api.ingredient_search import ingredient_index
+from api.management.fixtures import seed_fixtures
+from api.management.scenarios import BENCHMARK_PASSWORD, SCENARIOS
+from api.pantry import pantry_index
+from api.shopping_cart import invalidate_cart_pdf
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver
+from django.urls.resolvers import URLResolver
+from recipes.models import Recipe
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+DEFAULT_BASELINE = os.path.join(
+    settings.BASE_DIR, 'data', 'benchmark_baseline.json'
+)
+DATASET_OPTIONS = ('recipes', 'users', 'ingredients')
+
+
+def get_api_route_names(patterns=None):
+    names = set()
+    for pattern in patterns or get_resolver('api.urls').url_patterns:
+        if isinstance(pattern, URLResolver):
+            names |= get_api_route_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def percentile(timings, point):
+    return statistics.quantiles(timings, n=100, method='inclusive')[point - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк всех маршрутов API: число запросов к базе, '
+        'p50/p95/p99 и пик памяти в сравнении с сохранённым эталоном'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=50000)
+        parser.add_argument('--ingredients', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--only', default='*')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument('--tolerance', type=float, default=0.5)
+        parser.add_argument('--min-delta-ms', type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 2:
+            raise CommandError('--repeat должен быть не меньше 2')
+        dataset = {name: options[name] for name in DATASET_OPTIONS}
+        baseline = (
+            {} if options['save_baseline']
+            else self.load_baseline(options['baseline'], dataset)
+        )
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                results = self.run(options)
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+            self.reset_caches()
+        regressions = [
+            name for name, result in results.items()
+            if self.report(name, result, baseline.get(name), options)
+        ]
+        if options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {'dataset': dataset, 'results': results},
+                    file, ensure_ascii=False, indent=2, sort_keys=True,
+                )
+            self.stdout.write(f'Эталон сохранён в {options["baseline"]}')
+            return
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности: ' + ', '.join(regressions)
+            )
+
+    def load_baseline(self, path, dataset):
+        if not os.path.exists(path):
+            raise CommandError(
+                f'Эталон {path} не найден, снимите его с --save-baseline'
+            )
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline['dataset'] != dataset:
+            self.stdout.write(self.style.WARNING(
+                f'Эталон снят на другом наборе данных {baseline["dataset"]}, '
+                'сравнение пропущено'
+            ))
+            return {}
+        return baseline['results']
+
+    def reset_caches(self):
+        ingredient_index.invalidate()
+        pantry_index.invalidate()
+        catalogue_cache.invalidate('tags')
+        catalogue_cache.invalidate('ingredients')
+
+    def run(self, options):
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if fnmatch(scenario.name, options['only'])
+        ]
+        results = {}
+        self.covered = set()
+        with transaction.atomic():
+            self.stdout.write('Заполнение базы...')
+            started = time.perf_counter()
+            context = self.get_context(seed_fixtures(
+                options['recipes'],
+                users=options['users'],
+                ingredients=options['ingredients'],
+            ))
+            self.stdout.write(
+                f'Готово за {time.perf_counter() - started:.1f} с'
+            )
+            self.reset_caches()
+            client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+            for scenario in scenarios:
+                results[scenario.name] = self.measure(
+                    client, scenario, context, options['repeat']
+                )
+            invalidate_cart_pdf((context['user'],))
+            transaction.set_rollback(True)
+        if options['only'] == '*':
+            self.report_coverage()
+        return results
+
+    def get_context(self, fixtures):
+        user = fixtures.user
+        user.set_password(BENCHMARK_PASSWORD)
+        user.save(update_fields=('password',))
+        strangers = list(User.objects.exclude(
+            following__user=user
+        ).exclude(id=user.id).values_list('id', flat=True)[:21])
+        return {
+            'user': user.id,
+            'email': user.email,
+            'author': fixtures.author.id,
+            'stranger': strangers[0],
+            'batch_authors': strangers[1:],
+            'recipe': fixtures.recipe_ids[-1],
+            'batch_recipes': fixtures.recipe_ids[-20:],
+            'deep_page': max(len(fixtures.recipe_ids) // 12, 1),
+            'own_recipe': Recipe.objects.filter(
+                author=user
+            ).values_list('id', flat=True).first(),
+            'tag': fixtures.tag.slug,
+            'tag_id': fixtures.tag.id,
+            'tag_ids': fixtures.tag_ids,
+            'ingredient': fixtures.ingredient_ids[0],
+            'ingredient_ids': fixtures.ingredient_ids,
+            'pantry': ','.join(map(str, fixtures.ingredient_ids[:5])),
+        }
+
+    def request(self, client, scenario, context):
+        context = {**context, **(
+            scenario.prepare(context) if scenario.prepare else {}
+        )}
+        credentials = {}
+        if scenario.user:
+            token, _ = Token.objects.get_or_create(
+                user_id=context[scenario.user]
+            )
+            credentials['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        data = scenario.data
+        if callable(data):
+            data = data(context)
+        url = scenario.url.format(**context)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, scenario.method)(
+                url, data, format='json', **credentials
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{scenario.name}: {url} вернул {response.status_code}'
+            )
+        if scenario.cleanup:
+            scenario.cleanup(context, response)
+        self.covered.add(response.resolver_match.url_name)
+        return elapsed, len(queries)
+
+    def measure(self, client, scenario, context, repeat):
+        self.request(client, scenario, context)
+        timings, query_counts = [], []
+        for _ in range(repeat):
+            elapsed, query_count = self.request(client, scenario, context)
+            timings.append(elapsed)
+            query_counts.append(query_count)
+        tracemalloc.start()
+        try:
+            self.request(client, scenario, context)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            'queries': max(query_counts),
+            'p50': percentile(timings, 50),
+            'p95': percentile(timings, 95),
+            'p99': percentile(timings, 99),
+            'peak_kb': peak / 1024,
+        }
+
+    def report_coverage(self):
+        missing = get_api_route_names() - self.covered
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                'Маршруты без сценария: ' + ', '.join(sorted(missing))
+            ))
+
+    def report(self, name, result, baseline, options):
+        line = (
+            f'{name:28} {result["queries"]:3} запр. '
+            f'p50 {result["p50"]:7.1f} p95 {result["p95"]:7.1f} '
+            f'p99 {result["p99"]:7.1f} мс  {result["peak_kb"]:8.0f} КиБ'
+        )
+        if baseline is None:
+            self.stdout.write(line)
+            return False
+        problems = self.compare(result, baseline, options)
+        if problems:
+            self.stdout.write(self.style.ERROR(
+                f'{line}  <- {", ".join(problems)}'
+            ))
+            return True
+        self.stdout.write(self.style.SUCCESS(line))
+        return False
+
+    def compare(self, result, baseline, options):
+        problems = []
+        limit = 1 + options['tolerance']
+        if result['queries'] > baseline['queries']:
+            problems.append(f'запросов было {baseline["queries"]}')
+        for key in ('p50', 'p95'):
+            if (
+                result[key] > baseline[key] * limit
+                and result[key] - baseline[key] > options['min_delta_ms']
+            ):
+                problems.append(f'{key} было {baseline[key]:.1f} мс')
+        if result['peak_kb'] > baseline['peak_kb'] * limit:
+            problems.append(f'память была {baseline["peak_kb"]:.0f} КиБ')
+        return problems
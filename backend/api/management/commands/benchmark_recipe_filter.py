@@ -0,0 +1,103 @@
+import time
+
+from api.views import RecipeViewSet
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Favorite, Recipe, RecipeTag, Shoppingcart, Tag
+from rest_framework.test import APIRequestFactory, force_authenticate
+from users.models import User
+
+QUERIES = (
+    'is_favorited=1',
+    'is_in_shopping_cart=1',
+    'is_favorited=1&is_in_shopping_cart=1&tags=bench&author={author}',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Регрессионный бенчмарк фильтров списка рецептов '
+        'для пользователя с большим избранным'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--favorites', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--max-queries', type=int, default=8)
+        parser.add_argument('--max-ms', type=float, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user, author = self.seed(options['favorites'])
+            failures = [
+                self.measure(
+                    user,
+                    query.format(author=author.id),
+                    options,
+                )
+                for query in QUERIES
+            ]
+            transaction.set_rollback(True)
+        if any(failures):
+            raise CommandError('Бенчмарк фильтров не пройден')
+
+    def seed(self, favorites):
+        user = User.objects.create(
+            email='bench-user@foodgram.local', username='bench-user'
+        )
+        author = User.objects.create(
+            email='bench-author@foodgram.local', username='bench-author'
+        )
+        tag = Tag.objects.create(name='bench', color='#0B0B0B', slug='bench')
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f'Рецепт {number}',
+                image='bench.jpg',
+                text='Текст',
+                cooking_time=1,
+            )
+            for number in range(favorites)
+        )
+        recipe_ids = list(
+            Recipe.objects.filter(author=author).values_list('id', flat=True)
+        )
+        Favorite.objects.bulk_create(
+            Favorite(user=user, recipe_id=recipe_id)
+            for recipe_id in recipe_ids
+        )
+        Shoppingcart.objects.bulk_create(
+            Shoppingcart(user=user, recipe_id=recipe_id)
+            for recipe_id in recipe_ids[::2]
+        )
+        RecipeTag.objects.bulk_create(
+            RecipeTag(tag=tag, recipe_id=recipe_id)
+            for recipe_id in recipe_ids[::3]
+        )
+        return user, author
+
+    def measure(self, user, query, options):
+        view = RecipeViewSet.as_view({'get': 'list'})
+        timings = []
+        for _ in range(options['repeat']):
+            request = APIRequestFactory().get(
+                f'/api/recipes/?{query}',
+                HTTP_HOST=settings.ALLOWED_HOSTS[0],
+            )
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                view(request).render()
+                timings.append((time.perf_counter() - started) * 1000)
+        best = min(timings)
+        failed = (
+            len(queries) > options['max_queries']
+            or best > options['max_ms']
+        )
+        style = self.style.ERROR if failed else self.style.SUCCESS
+        self.stdout.write(style(
+            f'{query}: {len(queries)} запросов, {best:.1f} мс'
+        ))
+        return failed
@@ -0,0 +1,127 @@
+import re
+from types import SimpleNamespace
+
+from api.filters import RecipeFilter
+from api.management.fixtures import seed_fixtures
+from api.shopping_cart import get_cart_rows
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.http import QueryDict
+from recipes import feed
+from recipes.models import Ingredient, Recipe
+from users.models import Subscribe
+
+RECIPE_QUERIES = (
+    ('newest', ''),
+    ('popular', 'ordering=popular'),
+    ('fastest', 'ordering=fastest'),
+    ('tags', 'tags={tag}'),
+    ('author', 'author={author}'),
+    ('is_favorited', 'is_favorited=1'),
+    ('is_in_shopping_cart', 'is_in_shopping_cart=1'),
+    ('search', 'search=рецепт 7'),
+)
+ALIAS = re.compile(r'"(\w+)" (\w+)')
+SEQUENTIAL_SCANS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)$'),
+}
+
+
+def get_canonical_queries(fixtures):
+    request = SimpleNamespace(user=fixtures.user)
+    for name, query in RECIPE_QUERIES:
+        data = QueryDict(query.format(
+            tag=fixtures.tag.slug, author=fixtures.author.id
+        ))
+        yield f'recipes:{name}', RecipeFilter(
+            data, Recipe.objects.with_user_flags(fixtures.user),
+            request=request,
+        ).qs[:6]
+    yield 'subscriptions', Subscribe.objects.filter(
+        user=fixtures.user
+    ).select_related('author')[:6]
+    yield 'subscriptions:recipes', Recipe.objects.filter(
+        author=fixtures.author,
+        pk__in=Subquery(Recipe.objects.filter(
+            author=OuterRef('author')
+        ).values('pk')[:3]),
+    )
+    yield 'feed:timeline', feed.get_timeline(fixtures.user)[:6]
+    yield 'feed:fan_out_on_read', Recipe.objects.filter(
+        author__following__user=fixtures.author
+    )[:6]
+    yield 'shopping_cart', get_cart_rows(fixtures.user)
+    if connection.vendor == 'postgresql':
+        yield 'ingredients:prefix', Ingredient.objects.filter(
+            name__startswith='Ингредиент 1'
+        )[:50]
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет планы выполнения основных запросов на больших '
+        'фикстурах и падает при последовательном сканировании'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000)
+        parser.add_argument('--min-rows', type=int, default=1000)
+        parser.add_argument('--verbose-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCANS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'EXPLAIN не поддерживается для {connection.vendor}'
+            )
+        with transaction.atomic():
+            fixtures = seed_fixtures(options['recipes'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            large_tables = self.get_large_tables(options['min_rows'])
+            failures = [
+                name
+                for name, queryset in get_canonical_queries(fixtures)
+                if not self.check_plan(
+                    name, queryset, pattern, large_tables, options
+                )
+            ]
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError(
+                'Последовательное сканирование в запросах: '
+                + ', '.join(failures)
+            )
+
+    def get_large_tables(self, min_rows):
+        tables = set()
+        with connection.cursor() as cursor:
+            for table in connection.introspection.table_names(cursor):
+                cursor.execute(
+                    'SELECT COUNT(*) FROM '
+                    + connection.ops.quote_name(table)
+                )
+                if cursor.fetchone()[0] >= min_rows:
+                    tables.add(table)
+        return tables
+
+    def check_plan(self, name, queryset, pattern, large_tables, options):
+        sql = str(queryset.query)
+        aliases = {alias: table for table, alias in ALIAS.findall(sql)}
+        plan = queryset.explain()
+        scanned = {
+            aliases.get(match, match)
+            for line in plan.splitlines()
+            for match in pattern.findall(line.strip())
+        } & large_tables
+        if options['verbose_plans']:
+            self.stdout.write(f'{name}:\n{plan}\n')
+        if scanned:
+            self.stdout.write(self.style.ERROR(
+                f'{name}: полное сканирование {", ".join(sorted(scanned))}'
+            ))
+            return False
+        self.stdout.write(self.style.SUCCESS(f'{name}: OK'))
+        return True
@@ -0,0 +1,129 @@
+from collections import namedtuple
+
+from recipes import feed, search, shopping_list
+from recipes.counters import count_subquery, reconcile_counter
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeTag, Shoppingcart, Tag)
+from users.models import Subscribe, User
+
+BATCH_SIZE = 2000
+
+Fixtures = namedtuple(
+    'Fixtures',
+    ('user', 'author', 'tag', 'recipe_ids', 'ingredient_ids', 'tag_ids'),
+)
+
+
+def bulk_insert(model, objects):
+    model.objects.bulk_create(
+        objects, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def seed_fixtures(recipes, users=None, ingredients=None, tags=10,
+                  heavy=200):
+    users = users or max(recipes // 50, 2)
+    ingredients = ingredients or max(recipes // 10, 3)
+    bulk_insert(User, (
+        User(
+            email=f'fixture-{number}@foodgram.local',
+            username=f'fixture-{number}',
+        )
+        for number in range(users)
+    ))
+    user_objects = list(User.objects.filter(
+        username__startswith='fixture-'
+    ).order_by('id'))
+    bulk_insert(Tag, (
+        Tag(
+            name=f'fixture-{number}',
+            color=f'#F{number:05X}',
+            slug=f'fixture-{number}',
+        )
+        for number in range(tags)
+    ))
+    tag_objects = list(Tag.objects.filter(
+        slug__startswith='fixture-'
+    ).order_by('id'))
+    bulk_insert(Ingredient, (
+        Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+        for number in range(ingredients)
+    ))
+    ingredient_ids = list(Ingredient.objects.filter(
+        name__startswith='Ингредиент '
+    ).values_list('id', flat=True))
+    bulk_insert(Recipe, (
+        Recipe(
+            author=user_objects[number % users],
+            name=f'Рецепт {number}',
+            image='fixture.jpg',
+            text='Текст',
+            cooking_time=number % 120 + 1,
+            favorites_count=number % 97,
+        )
+        for number in range(recipes)
+    ))
+    recipe_ids = list(Recipe.objects.filter(
+        name__startswith='Рецепт '
+    ).values_list('id', flat=True))
+    bulk_insert(RecipeTag, (
+        RecipeTag(recipe_id=recipe_id, tag=tag_objects[position % tags])
+        for position, recipe_id in enumerate(recipe_ids)
+    ))
+    bulk_insert(RecipeIngredient, (
+        RecipeIngredient(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_ids[
+                (position + offset) % len(ingredient_ids)
+            ],
+            amount=offset + 1,
+        )
+        for position, recipe_id in enumerate(recipe_ids)
+        for offset in range(3)
+    ))
+    search.rebuild()
+    user, author = user_objects[:2]
+    bulk_insert(Favorite, (
+        Favorite(user=user_objects[position % users], recipe_id=recipe_id)
+        for position, recipe_id in enumerate(recipe_ids)
+    ))
+    bulk_insert(Favorite, (
+        Favorite(user=user, recipe_id=recipe_id)
+        for recipe_id in recipe_ids[:heavy]
+    ))
+    bulk_insert(Shoppingcart, (
+        Shoppingcart(
+            user=user_objects[(position + 1) % users], recipe_id=recipe_id
+        )
+        for position, recipe_id in enumerate(recipe_ids)
+    ))
+    bulk_insert(Shoppingcart, (
+        Shoppingcart(user=user, recipe_id=recipe_id)
+        for recipe_id in recipe_ids[:heavy]
+    ))
+    shopping_list.rebuild()
+    bulk_insert(Subscribe, (
+        Subscribe(
+            user=subscriber, author=user_objects[(position + step) % users]
+        )
+        for position, subscriber in enumerate(user_objects)
+        for step in range(1, min(users, 6))
+    ))
+    bulk_insert(Subscribe, (
+        Subscribe(user=user, author=followed)
+        for followed in user_objects[1:heavy + 1]
+    ))
+    reconcile_counter(
+        User.objects.all(),
+        'following_count',
+        count_subquery(Subscribe, 'user'),
+    )
+    feed.rebuild()
+    return Fixtures(
+        user=user,
+        author=author,
+        tag=tag_objects[0],
+        recipe_ids=recipe_ids,
+        ingredient_ids=ingredient_ids,
+        tag_ids=[tag.id for tag in tag_objects],
+    )
@@ -0,0 +1,247 @@
+from collections import namedtuple
+from itertools import count
+
+from django.core.cache import cache
+from recipes.models import Favorite, Recipe, Shoppingcart
+from rest_framework.throttling import ScopedRateThrottle
+from users.models import Subscribe, User
+
+BENCHMARK_PASSWORD = 'Benchmark-pass-2024'
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAAC'
+    'VBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQImWNoAAAAg'
+    'gCByxOyYQAAAABJRU5ErkJggg=='
+)
+
+Scenario = namedtuple(
+    'Scenario',
+    ('name', 'method', 'url', 'data', 'prepare', 'cleanup', 'user'),
+    defaults=(None, None, None, 'user'),
+)
+
+RECIPE_RELATION = {'user_id': 'user', 'recipe_id': 'recipe'}
+SUBSCRIPTION = {'user_id': 'user', 'author_id': 'stranger'}
+
+user_numbers = count()
+
+
+def get_recipe_payload(context, **extra):
+    return {
+        'name': 'Бенчмарк',
+        'text': 'Текст',
+        'cooking_time': 10,
+        'tags': context['tag_ids'][:2],
+        'ingredients': [
+            {'id': ingredient_id, 'amount': 5}
+            for ingredient_id in context['ingredient_ids'][:3]
+        ],
+        **extra,
+    }
+
+
+def create_recipe(context):
+    recipe = Recipe.objects.create(
+        author_id=context['user'],
+        name='Бенчмарк',
+        image='fixture.jpg',
+        text='Текст',
+        cooking_time=10,
+    )
+    return {'created': recipe.id}
+
+
+def delete_created_recipe(context, response):
+    Recipe.objects.filter(id=response.data['id']).delete()
+
+
+def remove_relation(model, lookup):
+    def prepare(context):
+        model.objects.filter(**{
+            field: context[key] for field, key in lookup.items()
+        }).delete()
+        return {}
+    return prepare
+
+
+def add_relation(model, lookup):
+    def prepare(context):
+        model.objects.get_or_create(**{
+            field: context[key] for field, key in lookup.items()
+        })
+        return {}
+    return prepare
+
+
+def drop_relation(model, lookup):
+    prepare = remove_relation(model, lookup)
+
+    def cleanup(context, response):
+        prepare(context)
+    return cleanup
+
+
+def batch_payload(key):
+    def payload(context):
+        return {'add': context[key]}
+    return payload
+
+
+def drop_batch(model, field, key):
+    def cleanup(context, response):
+        model.objects.filter(
+            user_id=context['user'], **{f'{field}_id__in': context[key]}
+        ).delete()
+    return cleanup
+
+
+def reset_throttle(scope):
+    def prepare(context):
+        cache.delete(ScopedRateThrottle.cache_format % {
+            'scope': scope, 'ident': context['user']
+        })
+        return {}
+    return prepare
+
+
+def new_user_payload(context):
+    number = next(user_numbers)
+    return {
+        'payload': {
+            'email': f'benchmark-{number}@foodgram.local',
+            'username': f'benchmark-{number}',
+            'first_name': 'Бенчмарк',
+            'last_name': 'Бенчмарк',
+            'password': BENCHMARK_PASSWORD,
+        }
+    }
+
+
+def delete_created_user(context, response):
+    User.objects.filter(id=response.data['id']).delete()
+
+
+SCENARIOS = (
+    Scenario('root', 'get', '/api/'),
+    Scenario('tags:list', 'get', '/api/tags/'),
+    Scenario('tags:detail', 'get', '/api/tags/{tag_id}/'),
+    Scenario('ingredients:search', 'get', '/api/ingredients/?name=ингр'),
+    Scenario('ingredients:detail', 'get', '/api/ingredients/{ingredient}/'),
+    Scenario('recipes:list:anonymous', 'get', '/api/recipes/', user=None),
+    Scenario('recipes:list', 'get', '/api/recipes/?limit=6'),
+    Scenario(
+        'recipes:deep_page', 'get', '/api/recipes/?limit=6&page={deep_page}'
+    ),
+    Scenario('recipes:cursor', 'get', '/api/recipes/?pagination=cursor'),
+    Scenario('recipes:popular', 'get', '/api/recipes/?ordering=popular'),
+    Scenario('recipes:author', 'get', '/api/recipes/?author={author}'),
+    Scenario('recipes:search', 'get', '/api/recipes/?search=рецепт 7'),
+    Scenario('recipes:feed', 'get', '/api/recipes/feed/'),
+    Scenario(
+        'recipes:feed:fan_out_on_read', 'get', '/api/recipes/feed/',
+        user='author',
+    ),
+    Scenario(
+        'recipes:from_pantry', 'get',
+        '/api/recipes/from_pantry/?ingredients={pantry}&limit=6',
+        prepare=reset_throttle('pantry'),
+    ),
+    Scenario(
+        'recipes:filters', 'get',
+        '/api/recipes/?tags={tag}&is_favorited=1&is_in_shopping_cart=1',
+    ),
+    Scenario('recipes:detail', 'get', '/api/recipes/{recipe}/'),
+    Scenario(
+        'recipes:create', 'post', '/api/recipes/',
+        data=lambda context: get_recipe_payload(context, image=IMAGE),
+        cleanup=delete_created_recipe,
+    ),
+    Scenario(
+        'recipes:update', 'patch', '/api/recipes/{own_recipe}/',
+        data=get_recipe_payload,
+    ),
+    Scenario(
+        'recipes:delete', 'delete', '/api/recipes/{created}/',
+        prepare=create_recipe,
+    ),
+    Scenario(
+        'favorite:add', 'post', '/api/recipes/{recipe}/favorite/',
+        prepare=remove_relation(Favorite, RECIPE_RELATION),
+        cleanup=drop_relation(Favorite, RECIPE_RELATION),
+    ),
+    Scenario(
+        'favorite:remove', 'delete', '/api/recipes/{recipe}/favorite/',
+        prepare=add_relation(Favorite, RECIPE_RELATION),
+    ),
+    Scenario(
+        'favorite:batch', 'post', '/api/recipes/favorite/batch/',
+        data=batch_payload('batch_recipes'),
+        cleanup=drop_batch(Favorite, 'recipe', 'batch_recipes'),
+    ),
+    Scenario(
+        'shopping_cart:add', 'post', '/api/recipes/{recipe}/shopping_cart/',
+        prepare=remove_relation(Shoppingcart, RECIPE_RELATION),
+        cleanup=drop_relation(Shoppingcart, RECIPE_RELATION),
+    ),
+    Scenario(
+        'shopping_cart:remove', 'delete',
+        '/api/recipes/{recipe}/shopping_cart/',
+        prepare=add_relation(Shoppingcart, RECIPE_RELATION),
+    ),
+    Scenario(
+        'shopping_cart:batch', 'post', '/api/recipes/shopping_cart/batch/',
+        data=batch_payload('batch_recipes'),
+        cleanup=drop_batch(Shoppingcart, 'recipe', 'batch_recipes'),
+    ),
+    Scenario('shopping_list', 'get', '/api/recipes/shopping_list/'),
+    Scenario('download:pdf', 'get', '/api/recipes/download_shopping_cart/'),
+    Scenario(
+        'download:txt', 'get',
+        '/api/recipes/download_shopping_cart/?format=txt',
+    ),
+    Scenario(
+        'download:csv', 'get',
+        '/api/recipes/download_shopping_cart/?format=csv',
+    ),
+    Scenario(
+        'subscriptions', 'get', '/api/users/subscriptions/?recipes_limit=3'
+    ),
+    Scenario(
+        'subscribe:add', 'post', '/api/users/{stranger}/subscribe/',
+        prepare=remove_relation(Subscribe, SUBSCRIPTION),
+        cleanup=drop_relation(Subscribe, SUBSCRIPTION),
+    ),
+    Scenario(
+        'subscribe:remove', 'delete', '/api/users/{stranger}/subscribe/',
+        prepare=add_relation(Subscribe, SUBSCRIPTION),
+    ),
+    Scenario(
+        'subscribe:batch', 'post', '/api/users/subscribe/batch/',
+        data=batch_payload('batch_authors'),
+        cleanup=drop_batch(Subscribe, 'author', 'batch_authors'),
+    ),
+    Scenario('users:list', 'get', '/api/users/?limit=6'),
+    Scenario('users:me', 'get', '/api/users/me/'),
+    Scenario('users:detail', 'get', '/api/users/{author}/'),
+    Scenario(
+        'users:create', 'post', '/api/users/',
+        data=lambda context: context['payload'],
+        prepare=new_user_payload,
+        cleanup=delete_created_user,
+        user=None,
+    ),
+    Scenario(
+        'users:set_password', 'post', '/api/users/set_password/',
+        data={
+            'current_password': BENCHMARK_PASSWORD,
+            'new_password': BENCHMARK_PASSWORD,
+        },
+    ),
+    Scenario(
+        'auth:login', 'post', '/api/auth/token/login/',
+        data=lambda context: {
+            'email': context['email'], 'password': BENCHMARK_PASSWORD,
+        },
+        user=None,
+    ),
+    Scenario('auth:logout', 'post', '/api/auth/token/logout/', user='author'),
+)
@@ -0,0 +1,124 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from functools import partial
+from http import HTTPStatus
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def render(self, name, labels):
+        cumulative = 0
+        for bucket, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.total}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+class Metrics:
+    counters = (
+        ('foodgram_requests_total', 'Запросы к API'),
+        ('foodgram_query_budget_exceeded_total', 'Превышения бюджета SQL'),
+        ('foodgram_n_plus_one_total', 'Запросы с повторяющимся SQL'),
+        ('foodgram_slow_queries_total', 'Медленные SQL-запросы'),
+    )
+    histograms = (
+        ('foodgram_db_queries', 'SQL-запросов на запрос к API', QUERY_BUCKETS),
+        (
+            'foodgram_db_duration_seconds',
+            'Время в базе на запрос к API',
+            DURATION_BUCKETS,
+        ),
+        (
+            'foodgram_request_duration_seconds',
+            'Время ответа',
+            DURATION_BUCKETS,
+        ),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.values = {name: defaultdict(int) for name, _ in self.counters}
+        self.distributions = {
+            name: defaultdict(partial(Histogram, buckets))
+            for name, _, buckets in self.histograms
+        }
+
+    def observe(self, view, status, recorder, elapsed, over_budget):
+        labels = f'view="{view}"'
+        with self.lock:
+            self.values['foodgram_requests_total'][
+                f'{labels},status="{status}"'
+            ] += 1
+            self.values['foodgram_query_budget_exceeded_total'][
+                labels
+            ] += over_budget
+            self.values['foodgram_n_plus_one_total'][labels] += bool(
+                recorder.get_repeated()
+            )
+            self.values['foodgram_slow_queries_total'][labels] += len(
+                recorder.slow
+            )
+            self.distributions['foodgram_db_queries'][labels].observe(
+                recorder.count
+            )
+            self.distributions['foodgram_db_duration_seconds'][
+                labels
+            ].observe(recorder.duration)
+            self.distributions['foodgram_request_duration_seconds'][
+                labels
+            ].observe(elapsed)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, description in self.counters:
+                lines += [
+                    f'# HELP {name} {description}', f'# TYPE {name} counter'
+                ]
+                lines += [
+                    f'{name}{{{labels}}} {value}'
+                    for labels, value in sorted(self.values[name].items())
+                ]
+            for name, description, _ in self.histograms:
+                lines += [
+                    f'# HELP {name} {description}',
+                    f'# TYPE {name} histogram',
+                ]
+                for labels, histogram in sorted(
+                    self.distributions[name].items()
+                ):
+                    lines.extend(histogram.render(name, labels))
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponse(status=HTTPStatus.FORBIDDEN)
+    return HttpResponse(metrics.render(), content_type=CONTENT_TYPE)
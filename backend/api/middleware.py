@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import metrics
+
+logger = logging.getLogger('foodgram.sql')
+
+IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+def get_template(sql):
+    return NUMBER.sub('?', IN_LIST.sub('(%s, ...)', sql))
+
+
+def get_view_name(request):
+    match = request.resolver_match
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name
+    method = request.method.lower()
+    actions = getattr(match.func, 'actions', None) or {}
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.templates = Counter()
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            self.templates[get_template(sql)] += 1
+            if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+                self.slow.append((elapsed, sql))
+
+    def get_repeated(self):
+        return {
+            template: count
+            for template, count in self.templates.items()
+            if count >= settings.N_PLUS_ONE_THRESHOLD
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class RecordedStream:
+    def __init__(self, chunks, recorder, on_close):
+        self.chunks = iter(chunks)
+        self.recorder = recorder
+        self.on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        token = current_recorder.set(self.recorder)
+        try:
+            return next(self.chunks)
+        finally:
+            current_recorder.reset(token)
+
+    def close(self):
+        on_close, self.on_close = self.on_close, None
+        if on_close is not None:
+            on_close()
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SQL_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        connection_created.connect(
+            install_recorder, dispatch_uid='install_recorder'
+        )
+        for connection in connections.all():
+            install_recorder(None, connection)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    def finish(self, request, response, recorder, started):
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.1f};'
+            f'desc="{recorder.count} queries", '
+            f'app;dur={(time.perf_counter() - started) * 1000:.1f}'
+        )
+        if response.streaming:
+            response.streaming_content = RecordedStream(
+                response.streaming_content,
+                recorder,
+                partial(self.observe, request, response, recorder, started),
+            )
+        else:
+            self.observe(request, response, recorder, started)
+        return response
+
+    def observe(self, request, response, recorder, started):
+        elapsed = time.perf_counter() - started
+        view = get_view_name(request)
+        budget = settings.QUERY_BUDGETS.get(
+            view, settings.QUERY_BUDGET_DEFAULT
+        )
+        over_budget = recorder.count > budget
+        metrics.observe(
+            view, response.status_code, recorder, elapsed, over_budget
+        )
+        self.log(request, response, view, recorder, elapsed, budget)
+
+    def log(self, request, response, view, recorder, elapsed, budget):
+        repeated = recorder.get_repeated()
+        flagged = recorder.count > budget or repeated or recorder.slow
+        level = logging.WARNING if flagged else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        logger.log(level, json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'budget': budget,
+            'db_ms': round(recorder.duration * 1000, 1),
+            'total_ms': round(elapsed * 1000, 1),
+            'repeated': [
+                {'count': count, 'sql': template}
+                for template, count in repeated.items()
+            ],
+            'slow': [
+                {'ms': round(duration * 1000, 1), 'sql': sql}
+                for duration, sql in recorder.slow
+            ],
+        }, ensure_ascii=False))
@@ -1,4 +1,5 @@
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class PageWithLimitPagination(PageNumberPagination):
@@ -6,5 +7,50 @@ class PageWithLimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
 
 
+class RecipeCursorPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-pub_date', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return queryset.query.order_by or self.ordering
+
+
+class RecipePagination(PageWithLimitPagination):
+    cursor_pagination = None
+
+    def use_cursor(self, request, queryset):
+        ordering = tuple(
+            queryset.query.order_by or RecipeCursorPagination.ordering
+        )
+        return ordering == RecipeCursorPagination.ordering and (
+            request.query_params.get('pagination') == 'cursor'
+            or RecipeCursorPagination.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request, queryset):
+            self.cursor_pagination = RecipeCursorPagination()
+            return self.cursor_pagination.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
 class RecipesLimitPagination(PageNumberPagination):
     page_size_query_param = 'recipes_limit'
+
+
+def get_recipes_limit(request):
+    try:
+        recipes_limit = int(request.query_params['recipes_limit'])
+    except (KeyError, ValueError):
+        return settings.RECIPES_LIMIT_DEFAULT
+    return max(0, min(recipes_limit, settings.RECIPES_LIMIT_MAX))
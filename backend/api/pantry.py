@@ -0,0 +1,209 @@
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from recipes.models import Recipe, RecipeIngredient
+from recipes.pending import collect_on_commit
+
+from .cache import bump_version, get_local_expiry, is_expired
+
+VERSION_KEY = 'pantry_index_version'
+CHANGE_KEY = 'pantry_index_change:{version}'
+
+Snapshot = namedtuple(
+    'Snapshot', ('version', 'expires', 'postings', 'sizes')
+)
+Match = namedtuple('Match', ('recipe_id', 'missing', 'matched', 'size'))
+
+
+def grow(sizes, length):
+    if len(sizes) < length:
+        sizes.frombytes(bytes(sizes.itemsize * (length - len(sizes))))
+
+
+def get_sizes(length, sizes=()):
+    sizes = array('H', sizes)
+    grow(sizes, length)
+    return sizes
+
+
+class PantryMatches:
+    def __init__(self, sizes, counts, buckets):
+        self.sizes = sizes
+        self.counts = counts
+        self.buckets = buckets
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+    def rank(self, recipe_id):
+        return -self.counts[recipe_id] / self.sizes[recipe_id], -recipe_id
+
+    def get_match(self, recipe_id):
+        return Match(
+            recipe_id=recipe_id,
+            missing=self.sizes[recipe_id] - self.counts[recipe_id],
+            matched=self.counts[recipe_id],
+            size=self.sizes[recipe_id],
+        )
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(len(self))
+        matches = []
+        offset = 0
+        for missing in sorted(self.buckets):
+            if offset >= stop:
+                break
+            bucket = self.buckets[missing]
+            if offset + len(bucket) > start:
+                top = heapq.nsmallest(stop - offset, bucket, key=self.rank)
+                matches += [
+                    self.get_match(recipe_id)
+                    for recipe_id in top[max(start - offset, 0):]
+                ]
+            offset += len(bucket)
+        return matches
+
+
+class PantryIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+
+    def get_snapshot(self):
+        version = cache.get(VERSION_KEY, 0)
+        snapshot = self.snapshot
+        if self.is_current(snapshot, version):
+            return snapshot
+        with self.lock:
+            snapshot = self.snapshot
+            if snapshot is not None and is_expired(snapshot.expires):
+                snapshot = None
+            if snapshot is not None and snapshot.version != version:
+                snapshot = self.update(snapshot, version)
+            if snapshot is None:
+                snapshot = self.build(version)
+            self.snapshot = snapshot
+            return snapshot
+
+    @staticmethod
+    def is_current(snapshot, version):
+        return (
+            snapshot is not None
+            and snapshot.version == version
+            and not is_expired(snapshot.expires)
+        )
+
+    def build(self, version):
+        postings = {}
+        sizes = get_sizes(
+            (Recipe.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        )
+        for ingredient_id, recipe_id in RecipeIngredient.objects.order_by(
+                'ingredient_id', 'recipe_id').values_list(
+                    'ingredient_id', 'recipe_id').iterator():
+            postings.setdefault(ingredient_id, array('I')).append(recipe_id)
+            if recipe_id >= len(sizes):
+                grow(sizes, recipe_id + 1)
+            sizes[recipe_id] += 1
+        return Snapshot(
+            version=version,
+            expires=get_local_expiry(
+                cache, settings.PANTRY_INDEX_LOCAL_TIMEOUT
+            ),
+            postings=postings,
+            sizes=sizes,
+        )
+
+    def update(self, snapshot, version):
+        if not 0 < version - snapshot.version <= (
+                settings.PANTRY_INDEX_MAX_CHANGES):
+            return None
+        keys = [
+            CHANGE_KEY.format(version=number)
+            for number in range(snapshot.version + 1, version + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return None
+        recipe_ids, ingredient_ids = set(), set()
+        for changed_recipes, changed_ingredients in changes.values():
+            recipe_ids.update(changed_recipes)
+            ingredient_ids.update(changed_ingredients)
+        rows = list(RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('ingredient_id', 'recipe_id'))
+        postings = dict(snapshot.postings)
+        sizes = get_sizes(max(recipe_ids) + 1, snapshot.sizes)
+        for ingredient_id in ingredient_ids | {row[0] for row in rows}:
+            posting = array('I', postings.get(ingredient_id, ()))
+            for recipe_id in recipe_ids:
+                position = bisect_left(posting, recipe_id)
+                if (position < len(posting)
+                        and posting[position] == recipe_id):
+                    del posting[position]
+            postings[ingredient_id] = posting
+        for recipe_id in recipe_ids:
+            sizes[recipe_id] = 0
+        for ingredient_id, recipe_id in rows:
+            insort(postings[ingredient_id], recipe_id)
+            sizes[recipe_id] += 1
+        return Snapshot(
+            version=version,
+            expires=snapshot.expires,
+            postings={
+                ingredient_id: posting
+                for ingredient_id, posting in postings.items() if posting
+            },
+            sizes=sizes,
+        )
+
+    def invalidate(self):
+        self.snapshot = None
+        bump_version(cache, VERSION_KEY)
+
+    def record_changes(self, rows):
+        collect_on_commit(self.publish, rows)
+
+    def publish(self, rows):
+        cache.add(VERSION_KEY, 0, None)
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            self.snapshot = None
+            return
+        cache.set(
+            CHANGE_KEY.format(version=version),
+            (
+                {recipe_id for recipe_id, _ in rows},
+                {ingredient_id for _, ingredient_id in rows},
+            ),
+            settings.PANTRY_INDEX_CHANGES_TIMEOUT,
+        )
+
+    def match(self, ingredient_ids):
+        snapshot = self.get_snapshot()
+        sizes = snapshot.sizes
+        counts = get_sizes(len(sizes))
+        touched = []
+        for ingredient_id in set(ingredient_ids):
+            for recipe_id in snapshot.postings.get(ingredient_id, ()):
+                if not counts[recipe_id]:
+                    touched.append(recipe_id)
+                counts[recipe_id] += 1
+        buckets = {}
+        for recipe_id in touched:
+            buckets.setdefault(
+                sizes[recipe_id] - counts[recipe_id], []
+            ).append(recipe_id)
+        return PantryMatches(sizes, counts, buckets)
+
+
+pantry_index = PantryIndex()
@@ -14,7 +14,7 @@ class IsAuthorOrReadOnly(BasePermission):
             or (
                 request.user.is_authenticated
                 and (
-                    obj.author == request.user
+                    obj.author_id == request.user.id
                 )
             )
         )
@@ -0,0 +1,46 @@
+from django.utils.functional import cached_property
+from recipes.models import Favorite, Shoppingcart
+from users.models import Subscribe
+
+
+class UserRelations:
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def subscribed_author_ids(self):
+        if self.user.is_anonymous:
+            return frozenset()
+        return frozenset(
+            Subscribe.objects.filter(
+                user=self.user
+            ).values_list('author_id', flat=True)
+        )
+
+    @cached_property
+    def favorite_recipe_ids(self):
+        if self.user.is_anonymous:
+            return frozenset()
+        return frozenset(
+            Favorite.objects.filter(
+                user=self.user
+            ).values_list('recipe_id', flat=True)
+        )
+
+    @cached_property
+    def cart_recipe_ids(self):
+        if self.user.is_anonymous:
+            return frozenset()
+        return frozenset(
+            Shoppingcart.objects.filter(
+                user=self.user
+            ).values_list('recipe_id', flat=True)
+        )
+
+
+def get_relations(request):
+    relations = getattr(request, '_user_relations', None)
+    if relations is None or relations.user != request.user:
+        relations = UserRelations(request.user)
+        request._user_relations = relations
+    return relations
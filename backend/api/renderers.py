@@ -0,0 +1,31 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class DownloadRenderer(BaseRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, bytes):
+            return data
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+class PDFRenderer(DownloadRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = 'utf-8'
+    render_style = 'binary'
+
+
+class CSVRenderer(DownloadRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+
+class PlainTextRenderer(DownloadRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
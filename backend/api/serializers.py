@@ -1,40 +1,63 @@
+import base64
+import uuid
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
 from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.db import transaction
+from PIL import Image
+from recipes import shopping_list
+from recipes.images import variant_urls
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            RecipeTag, Shoppingcart, Tag)
+                            RecipeTag, Shoppingcart, ShoppingListItem, Tag)
 from rest_framework import serializers
 from users.models import Subscribe, User
 
+from .pagination import get_recipes_limit
+from .pantry import pantry_index
+from .relations import get_relations
+
 
 class Base64ImageField(serializers.ImageField):
+    chunk_size = 4 * 64 * 1024
 
     def to_internal_value(self, data):
-        import base64
-        import uuid
-
-        import six
-        from django.core.files.base import ContentFile
-
-        if isinstance(data, six.string_types):
+        if isinstance(data, str):
             if 'data:' in data and ';base64,' in data:
                 header, data = data.split(';base64,')
-
+            decoded_file = SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+            )
             try:
-                decoded_file = base64.b64decode(data)
-            except TypeError:
+                for chunk in self.get_chunks(data):
+                    decoded_file.write(base64.b64decode(chunk, validate=True))
+            except (TypeError, ValueError):
                 self.fail('invalid_image')
-
             file_name = str(uuid.uuid4())[:12]
-            file_extension = self.get_file_extension(file_name, decoded_file)
-            complete_file_name = "%s.%s" % (file_name, file_extension, )
-            data = ContentFile(decoded_file, name=complete_file_name)
-
-        return super(Base64ImageField, self).to_internal_value(data)
-
-    def get_file_extension(self, file_name, decoded_file):
-        import imghdr
-
-        extension = imghdr.what(file_name, decoded_file)
-        return "jpg" if extension == "jpeg" else extension
+            file_extension = self.get_file_extension(decoded_file)
+            data = File(
+                decoded_file, name=f'{file_name}.{file_extension}'
+            )
+        return super().to_internal_value(data)
+
+    def get_chunks(self, data):
+        rest = ''
+        for start in range(0, len(data), self.chunk_size):
+            chunk = rest + ''.join(data[start:start + self.chunk_size].split())
+            size = len(chunk) - len(chunk) % 4
+            rest = chunk[size:]
+            yield chunk[:size]
+        yield rest
+
+    def get_file_extension(self, decoded_file):
+        decoded_file.seek(0)
+        try:
+            image_format = Image.open(decoded_file).format
+        except (OSError, Image.DecompressionBombError):
+            self.fail('invalid_image')
+        decoded_file.seek(0)
+        return 'jpg' if image_format == 'JPEG' else image_format.lower()
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -55,8 +78,20 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient_id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
 class RecipeIngredientShortSerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField(source='ingredient.id')
+    id = serializers.IntegerField(source='ingredient_id')
 
     class Meta:
         model = RecipeIngredient
@@ -69,10 +104,22 @@ class TagSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class ImageVariantsField(serializers.Field):
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return variant_urls(value, self.context.get('request'))
+
+
 class RecipeShortSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -100,15 +147,11 @@ class UserSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
-        if request.user.is_anonymous:
+        if request is None or request.user.is_anonymous:
             return False
-        return(
-            Subscribe.objects.filter(
-                user=request.user,
-                author__id=obj.id
-            ).exists()
-            and request.user.is_authenticated
-        )
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in get_relations(request).subscribed_author_ids
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -130,28 +173,28 @@ class SubscribeSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
-        if not request:
+        if not request or obj.user_id == request.user.id:
             return True
-        return(
-            Subscribe.objects.filter(
-                user=request.user,
-                author__id=obj.author.id
-            ).exists()
-            and request.user.is_authenticated
+        return (
+            obj.author_id in get_relations(request).subscribed_author_ids
         )
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
+        return obj.author.recipes_count
 
     def get_recipes(self, obj):
-        try:
-            recipes_limit = int(
-                self.context.get('request').query_params['recipes_limit']
+        recipes = getattr(obj.author, 'limited_recipes', None)
+        if recipes is None:
+            request = self.context.get('request')
+            recipes_limit = (
+                get_recipes_limit(request) if request
+                else settings.RECIPES_LIMIT_DEFAULT
             )
-            recipes = Recipe.objects.filter(author=obj.author)[:recipes_limit]
-        except Exception:
-            recipes = Recipe.objects.filter(author=obj.author)
-        serializer = RecipeShortSerializer(recipes, many=True,)
+            recipes = Recipe.objects.filter(
+                author=obj.author)[:recipes_limit]
+        serializer = RecipeShortSerializer(
+            recipes, many=True, context=self.context
+        )
         return serializer.data
 
 
@@ -160,6 +203,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField()
     tags = TagSerializer(many=True)
     author = UserSerializer(many=False)
+    image_variants = ImageVariantsField()
     ingredients = RecipeIngredientSerializer(
         many=True,
         source='recipe_ingredient'
@@ -170,33 +214,42 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'tags', 'author', 'ingredients',
             'is_favorited', 'is_in_shopping_cart',
-            'name', 'image', 'text', 'cooking_time'
+            'name', 'image', 'image_variants', 'text', 'cooking_time'
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        return(
-            Favorite.objects.filter(
-                user=request.user,
-                recipe__id=obj.id
-            ).exists()
-            and request.user.is_authenticated
-        )
+        return obj.id in get_relations(request).favorite_recipe_ids
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        return(
-            Shoppingcart.objects.filter(
-                user=request.user,
-                recipe__id=obj.id
-            ).exists()
-            and request.user.is_authenticated
+        return obj.id in get_relations(request).cart_recipe_ids
+
+
+class PantryRecipeSerializer(RecipeSerializer):
+    missing_count = serializers.ReadOnlyField(source='match.missing')
+    coverage = serializers.SerializerMethodField()
+    missing_ingredients = serializers.SerializerMethodField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + (
+            'missing_count', 'coverage', 'missing_ingredients'
         )
 
+    def get_coverage(self, obj):
+        return round(obj.match.matched / obj.match.size, 3)
+
+    def get_missing_ingredients(self, obj):
+        pantry = self.context['pantry']
+        return [
+            row.ingredient_id for row in obj.recipe_ingredient.all()
+            if row.ingredient_id not in pantry
+        ]
+
 
 class RecipePostSerializer(serializers.ModelSerializer):
     image = Base64ImageField(max_length=None, use_url=False)
@@ -222,63 +275,98 @@ class RecipePostSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, obj):
         request = self.context.get('request')
-        return(
-            Shoppingcart.objects.filter(
-                user=request.user,
-                recipe__id=obj.id
-            ).exists()
-            and request.user.is_authenticated
-        )
+        return obj.id in get_relations(request).cart_recipe_ids
 
     def get_is_favorited(self, obj):
         request = self.context.get('request')
-        return(
-            Favorite.objects.filter(
-                user=request.user,
-                recipe__id=obj.id
-            ).exists()
-            and request.user.is_authenticated
-        )
+        return obj.id in get_relations(request).favorite_recipe_ids
 
     def validate_ingredients(self, value):
-        ingredients_list = []
-        ingredients = value
-        for ingredient in ingredients:
-            if ingredient['amount'] < 1:
-                raise serializers.ValidationError(
-                    'Количество должно быть равным или больше 1!')
-            check_id = ingredient['ingredient']['id']
-            check_ingredient = Ingredient.objects.filter(id=check_id)
-            if not check_ingredient.exists():
-                raise serializers.ValidationError(
-                    'Ингредиента нет в базе!')
-            if check_ingredient in ingredients_list:
-                raise serializers.ValidationError(
-                    'Продукты не должны повторяться!')
-            ingredients_list.append(check_ingredient)
+        if any(ingredient['amount'] < 1 for ingredient in value):
+            raise serializers.ValidationError(
+                'Количество должно быть равным или больше 1!')
+        ingredient_ids = {
+            ingredient['ingredient_id'] for ingredient in value
+        }
+        if len(ingredient_ids) != len(value):
+            raise serializers.ValidationError(
+                'Продукты не должны повторяться!')
+        if Ingredient.objects.filter(
+                id__in=ingredient_ids).count() != len(ingredient_ids):
+            raise serializers.ValidationError(
+                'Ингредиента нет в базе!')
         return value
 
     def add_tags_and_ingredients(self, tags, ingredients, recipe):
-        for tag in tags:
-            recipe.tags.add(tag)
-            recipe.save()
-        for ingredient in ingredients:
-            if not RecipeIngredient.objects.filter(
-                    ingredient_id=ingredient['ingredient']['id'],
-                    recipe=recipe).exists():
-                ingredientrecipe = RecipeIngredient.objects.create(
-                    ingredient_id=ingredient['ingredient']['id'],
-                    recipe=recipe)
-                ingredientrecipe.amount = ingredient['amount']
-                ingredientrecipe.save()
-            else:
-                RecipeIngredient.objects.filter(
-                    recipe=recipe).delete()
-                recipe.delete()
-                raise serializers.ValidationError(
-                    'Данные продукты повторяются в рецепте!')
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag) for tag in tags
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient['ingredient_id'],
+                amount=ingredient['amount'],
+            )
+            for ingredient in ingredients
+        )
+        pantry_index.record_changes(
+            (recipe.id, ingredient['ingredient_id'])
+            for ingredient in ingredients
+        )
+        return recipe
+
+    def update_tags_and_ingredients(self, tags, ingredients, recipe):
+        old_tag_ids = set(
+            RecipeTag.objects.filter(
+                recipe=recipe).values_list('tag_id', flat=True)
+        )
+        new_tag_ids = {tag.id for tag in tags}
+        RecipeTag.objects.filter(
+            recipe=recipe, tag_id__in=old_tag_ids - new_tag_ids).delete()
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag_id=tag_id)
+            for tag_id in new_tag_ids - old_tag_ids
+        )
+        old_rows = {
+            row.ingredient_id: row
+            for row in RecipeIngredient.objects.filter(recipe=recipe)
+        }
+        amounts = {
+            ingredient['ingredient_id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        deltas = {
+            ingredient_id: amount - (
+                old_rows[ingredient_id].amount if ingredient_id in old_rows
+                else 0
+            )
+            for ingredient_id, amount in amounts.items()
+        }
+        RecipeIngredient.objects.filter(
+            recipe=recipe,
+            ingredient_id__in=old_rows.keys() - amounts.keys()
+        ).delete()
+        changed_rows = []
+        for ingredient_id, row in old_rows.items():
+            if ingredient_id in amounts and row.amount != amounts[
+                    ingredient_id]:
+                row.amount = amounts[ingredient_id]
+                changed_rows.append(row)
+        RecipeIngredient.objects.bulk_update(changed_rows, ('amount',))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in old_rows
+        )
+        shopping_list.change_recipe(recipe.id, deltas)
+        pantry_index.record_changes(
+            (recipe.id, ingredient_id) for ingredient_id in deltas
+        )
         return recipe
 
+    @transaction.atomic
     def create(self, validated_data):
         author = validated_data.get('author')
         tags = validated_data.pop('tags')
@@ -296,25 +384,58 @@ class RecipePostSerializer(serializers.ModelSerializer):
         )
         return self.add_tags_and_ingredients(tags, ingredients, recipe)
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('recipe_ingredient')
-        RecipeTag.objects.filter(recipe=instance).delete()
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-        instance = self.add_tags_and_ingredients(
+        instance = self.update_tags_and_ingredients(
             tags, ingredients, instance)
-        super().update(instance, validated_data)
-        instance.save()
-        return instance
+        return super().update(instance, validated_data)
 
 
 class RecipeCartSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class CartSerializer(serializers.ModelSerializer):
     class Meta:
         model = Shoppingcart
         fields = '__all__'
+
+
+class BatchSerializer(serializers.Serializer):
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.BATCH_MAX_ITEMS,
+        default=list,
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.BATCH_MAX_ITEMS,
+        default=list,
+    )
+
+    def validate_add(self, value):
+        return list(dict.fromkeys(value))
+
+    def validate_remove(self, value):
+        return list(dict.fromkeys(value))
+
+    def validate(self, data):
+        if not data['add'] and not data['remove']:
+            raise serializers.ValidationError(
+                'Передайте id в списке add или remove'
+            )
+        if set(data['add']) & set(data['remove']):
+            raise serializers.ValidationError(
+                'Один и тот же id не может быть в add и remove'
+            )
+        if len(data['add']) + len(data['remove']) > settings.BATCH_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f'Не больше {settings.BATCH_MAX_ITEMS} id за запрос'
+            )
+        return data
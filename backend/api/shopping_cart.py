@@ -0,0 +1,152 @@
+import csv
+import hashlib
+import json
+from io import BytesIO
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from recipes import units
+from recipes.models import ShoppingListItem
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+FONT_NAME = 'FreeSans'
+PDF_CACHE_KEY = 'shopping_cart_pdf:{user_id}'
+
+
+def get_cart_rows(user):
+    return ShoppingListItem.objects.filter(user=user).values(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        ingredient_total=F('amount'),
+    ).order_by('ingredient__name')
+
+
+def combine_rows(rows):
+    for name, items in groupby(rows, key=itemgetter('ingredient__name')):
+        totals = {}
+        for item in items:
+            unit, amount = units.to_base(
+                item['ingredient__measurement_unit'], item['ingredient_total']
+            )
+            totals[unit] = totals.get(unit, 0) + amount
+        for base, total in totals.items():
+            unit, amount = units.humanize(base, total)
+            yield {
+                'ingredient__name': name,
+                'ingredient__measurement_unit': unit,
+                'ingredient_total': amount,
+            }
+
+
+def get_cart_items(user):
+    return combine_rows(get_cart_rows(user).iterator())
+
+
+def format_row(number, item):
+    return (
+        f'{number}.  {item["ingredient__name"]} - '
+        f'{item["ingredient_total"]}'
+        f' {item["ingredient__measurement_unit"]}'
+    )
+
+
+def get_cart_digest(rows):
+    return hashlib.sha256(
+        json.dumps(rows, ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+def render_pdf(rows):
+    buffer = BytesIO()
+    begin_position_x, begin_position_y = 40, 650
+    sheet = canvas.Canvas(buffer, pagesize=A4)
+    sheet.setFont(FONT_NAME, 36)
+    sheet.setTitle('Список покупок')
+    sheet.drawString(
+        begin_position_x,
+        begin_position_y + 40,
+        'Список покупок: '
+    )
+    sheet.setFont(FONT_NAME, 20)
+    for number, item in enumerate(rows, start=1):
+        if begin_position_y < 100:
+            begin_position_y = 700
+            sheet.showPage()
+            sheet.setFont(FONT_NAME, 20)
+        sheet.drawString(
+            begin_position_x,
+            begin_position_y,
+            format_row(number, item)
+        )
+        begin_position_y -= 30
+    sheet.showPage()
+    sheet.save()
+    return buffer.getvalue()
+
+
+def iter_txt(rows):
+    yield 'Список покупок:\n'
+    for number, item in enumerate(rows, start=1):
+        yield format_row(number, item) + '\n'
+
+
+class EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(EchoBuffer())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for item in rows:
+        yield writer.writerow((
+            item['ingredient__name'],
+            item['ingredient__measurement_unit'],
+            item['ingredient_total'],
+        ))
+
+
+def iter_json(rows):
+    yield '['
+    for number, item in enumerate(rows):
+        if number:
+            yield ','
+        yield json.dumps({
+            'name': item['ingredient__name'],
+            'measurement_unit': item['ingredient__measurement_unit'],
+            'amount': item['ingredient_total'],
+        }, ensure_ascii=False)
+    yield ']'
+
+
+EXPORTERS = {
+    'csv': iter_csv,
+    'json': iter_json,
+    'txt': iter_txt,
+}
+
+
+def get_cart_pdf(user, rows):
+    rows = list(rows)
+    key = PDF_CACHE_KEY.format(user_id=user.id)
+    digest = get_cart_digest(rows)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    document = render_pdf(rows)
+    cache.set(
+        key,
+        (digest, document),
+        settings.SHOPPING_CART_CACHE_TIMEOUT
+    )
+    return document
+
+
+def invalidate_cart_pdf(user_ids):
+    cache.delete_many(
+        [PDF_CACHE_KEY.format(user_id=user_id) for user_id in user_ids]
+    )
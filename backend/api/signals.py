@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import Ingredient, RecipeIngredient, Shoppingcart, Tag
+from recipes.signals import ingredients_imported
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from .authentication import invalidate_user
+from .cache import catalogue_cache
+from .ingredient_search import ingredient_index
+from .pantry import pantry_index
+from .shopping_cart import invalidate_cart_pdf
+
+
+@receiver((post_save, post_delete), sender=Shoppingcart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    invalidate_cart_pdf((instance.user_id,))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    invalidate_cart_pdf(
+        Shoppingcart.objects.filter(
+            recipe_id=instance.recipe_id
+        ).values_list('user_id', flat=True)
+    )
+    pantry_index.record_changes(
+        ((instance.recipe_id, instance.ingredient_id),)
+    )
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver(ingredients_imported)
+def ingredient_changed(sender, **kwargs):
+    ingredient_index.invalidate()
+    catalogue_cache.invalidate('ingredients')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, **kwargs):
+    catalogue_cache.invalidate('tags')
+
+
+@receiver((post_save, post_delete), sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    idle_after = time.monotonic() - settings.DB_CONN_HEALTH_CHECK_IDLE
+    for connection in connections.all():
+        if (connection.connection is not None
+                and not connection.in_atomic_block
+                and getattr(connection, 'released_at', 0) < idle_after
+                and not connection.is_usable()):
+            connection.close()
+
+
+@receiver(request_finished)
+def release_connections(sender, **kwargs):
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    released_at = time.monotonic()
+    for connection in connections.all():
+        connection.released_at = released_at
@@ -0,0 +1,46 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from recipes.models import Ingredient
+from rest_framework.test import APITestCase
+
+
+class IngredientCacheTest(APITestCase):
+    url = '/api/ingredients/'
+
+    def setUp(self):
+        cache.clear()
+        Ingredient.objects.create(name='Мука', measurement_unit='г')
+        Ingredient.objects.create(name='Молоко', measurement_unit='мл')
+
+    def get_names(self, response):
+        return [ingredient['name'] for ingredient in response.data]
+
+    def test_search_sends_etag_and_not_modified(self):
+        response = self.client.get(self.url, {'name': 'мук'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(self.get_names(response), ['Мука'])
+        etag = response['ETag']
+        response = self.client.get(
+            self.url, {'name': 'мук'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_name(self):
+        flour = self.client.get(self.url, {'name': 'мук'})
+        milk = self.client.get(
+            self.url, {'name': 'мол'}, HTTP_IF_NONE_MATCH=flour['ETag']
+        )
+        self.assertEqual(milk.status_code, HTTPStatus.OK)
+        self.assertEqual(self.get_names(milk), ['Молоко'])
+        self.assertNotEqual(milk['ETag'], flour['ETag'])
+
+    def test_ingredient_change_invalidates_cache(self):
+        etag = self.client.get(self.url, {'name': 'мо'})['ETag']
+        Ingredient.objects.create(name='Морковь', measurement_unit='г')
+        response = self.client.get(
+            self.url, {'name': 'мо'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('Морковь', self.get_names(response))
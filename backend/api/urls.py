@@ -1,15 +1,35 @@
+from django.conf import settings
 from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CartViewSet, DownloadShoppingCartViewSet, FavoriteViewSet,
-                    IngredientViewSet, RecipeViewSet, SubscribeViewSet,
-                    TagViewSet)
+from .async_views import async_view
+from .views import (CartBatchViewSet, CartViewSet, DownloadShoppingCartViewSet,
+                    FavoriteBatchViewSet, FavoriteViewSet, FeedViewSet,
+                    IngredientViewSet, PantryViewSet, RecipeViewSet,
+                    ShoppingListViewSet, SubscribeBatchViewSet,
+                    SubscribeViewSet, TagViewSet)
 
 router_v1 = DefaultRouter()
 router_v1.register(r'tags', TagViewSet, basename='tags')
 router_v1.register(r'ingredients', IngredientViewSet, basename='ingredients')
 router_v1.register(r'recipes', RecipeViewSet, basename='recipes')
 
+subscribe_view = SubscribeViewSet.as_view(
+    {'post': 'create', 'delete': 'delete'}
+)
+favorite_view = FavoriteViewSet.as_view(
+    {'post': 'create', 'delete': 'delete'}
+)
+shopping_cart_view = CartViewSet.as_view(
+    {'post': 'create', 'delete': 'delete'}
+)
+download_view = DownloadShoppingCartViewSet.as_view()
+
+if settings.ASYNC_VIEWS:
+    subscribe_view = async_view(subscribe_view)
+    favorite_view = async_view(favorite_view)
+    shopping_cart_view = async_view(shopping_cart_view)
+    download_view = async_view(download_view)
 
 urlpatterns = [
     path(
@@ -17,26 +37,56 @@ urlpatterns = [
         SubscribeViewSet.as_view({'get': 'list'}),
         name='subscriptions'
     ),
+    path(
+        'users/subscribe/batch/',
+        SubscribeBatchViewSet.as_view({'post': 'create'}),
+        name='subscribe_batch'
+    ),
+    path(
+        'recipes/favorite/batch/',
+        FavoriteBatchViewSet.as_view({'post': 'create'}),
+        name='favorite_batch'
+    ),
+    path(
+        'recipes/shopping_cart/batch/',
+        CartBatchViewSet.as_view({'post': 'create'}),
+        name='shopping_cart_batch'
+    ),
     re_path(
         r'users/(?P<author_id>\d+)/subscribe/',
-        SubscribeViewSet.as_view({'post': 'create', 'delete': 'delete'}),
+        subscribe_view,
         name='to_subscribe'
     ),
     re_path(
         r'recipes/(?P<recipe_id>\d+)/favorite/',
-        FavoriteViewSet.as_view({'post': 'create', 'delete': 'delete'}),
+        favorite_view,
         name='favorites'
     ),
     re_path(
         r'recipes/(?P<recipe_id>\d+)/shopping_cart/',
-        CartViewSet.as_view({'post': 'create', 'delete': 'delete'}),
+        shopping_cart_view,
         name='shopping_cart'
     ),
     path(
         'recipes/download_shopping_cart/',
-        DownloadShoppingCartViewSet.as_view(),
+        download_view,
         name='download'
     ),
+    path(
+        'recipes/shopping_list/',
+        ShoppingListViewSet.as_view({'get': 'list'}),
+        name='shopping_list'
+    ),
+    path(
+        'recipes/feed/',
+        FeedViewSet.as_view({'get': 'list'}),
+        name='feed'
+    ),
+    path(
+        'recipes/from_pantry/',
+        PantryViewSet.as_view({'get': 'list'}),
+        name='from_pantry'
+    ),
     path('', include('djoser.urls')),
     path(r'auth/', include('djoser.urls.authtoken')),
     path('', include(router_v1.urls)),
@@ -1,48 +1,80 @@
 from http import HTTPStatus
+from io import BytesIO
 
-from django.db import IntegrityError
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.http import FileResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            Shoppingcart, Tag)
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+from recipes import feed
+from recipes.models import (Favorite, Ingredient, Recipe, Shoppingcart,
+                            ShoppingListItem, Tag)
 from rest_framework import permissions, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.views import APIView
 from users.models import Subscribe, User
 
+from .batch import CartBatch, FavoriteBatch, SubscriptionBatch, lock_user
+from .cache import CachedCatalogueMixin
 from .customixins import (CreateDestroyViewSet, CreateListDestroyViewSet,
-                          ListRetriveViewSet)
-from .filters import IngredientFilter, RecipeFilter
-from .pagination import PageWithLimitPagination
+                          ListRetriveViewSet, ListViewSet,
+                          StatementTimeoutMixin)
+from .filters import RecipeFilter
+from .ingredient_search import ingredient_index
+from .pagination import (PageWithLimitPagination, RecipeCursorPagination,
+                         RecipePagination, get_recipes_limit)
+from .pantry import pantry_index
 from .permissions import IsAuthorOrReadOnly
-from .serializers import (CartSerializer, FavoriteSerializer,
-                          IngredientSerializer, RecipeCartSerializer,
-                          RecipePostSerializer, RecipeSerializer,
-                          RecipeShortSerializer, SubscribeSerializer,
+from .renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+from .serializers import (BatchSerializer, CartSerializer, FavoriteSerializer,
+                          IngredientSerializer, PantryRecipeSerializer,
+                          RecipeCartSerializer, RecipePostSerializer,
+                          RecipeSerializer, RecipeShortSerializer,
+                          ShoppingListItemSerializer, SubscribeSerializer,
                           TagSerializer, UserSerializer)
+from .shopping_cart import EXPORTERS, get_cart_items, get_cart_pdf
 
 
-class IngredientViewSet(ListRetriveViewSet):
+class IngredientViewSet(CachedCatalogueMixin, ListRetriveViewSet):
+    cache_namespace = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
     permission_classes = (permissions.AllowAny, )
-    filter_backends = (DjangoFilterBackend, IngredientFilter)
-    search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(self.search, request, *args, **kwargs)
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+    def search(self, request, *args, **kwargs):
+        try:
+            limit = min(
+                int(request.query_params.get(
+                    'limit', settings.INGREDIENT_SEARCH_LIMIT
+                )),
+                settings.INGREDIENT_SEARCH_LIMIT,
+            )
+        except ValueError:
+            limit = settings.INGREDIENT_SEARCH_LIMIT
+        return Response(ingredient_index.search(
+            request.query_params.get('name', ''), limit
+        ))
+
+
+class RecipeViewSet(StatementTimeoutMixin, viewsets.ModelViewSet):
+    statement_timeout = settings.API_STATEMENT_TIMEOUT
     permission_classes = (IsAuthorOrReadOnly, )
     filter_class = RecipeFilter
     filter_backends = (DjangoFilterBackend, )
-    pagination_class = PageWithLimitPagination
+    pagination_class = RecipePagination
+
+    def get_queryset(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return Recipe.objects.with_related(self.request.user)
+        return Recipe.objects.all()
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -54,7 +86,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user)
 
 
-class TagViewSet(ListRetriveViewSet):
+class TagViewSet(CachedCatalogueMixin, ListRetriveViewSet):
+    cache_namespace = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
@@ -68,20 +101,30 @@ class FavoriteViewSet(CreateDestroyViewSet):
     def get_queryset(self):
         return Favorite.objects.filter(user=self.request.user)
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         recipe_id = self.kwargs.get('recipe_id')
         recipe = get_object_or_404(Recipe, id=recipe_id)
+        if lock_user(request.user.pk, Favorite.objects.filter(
+                user=request.user, recipe=recipe)):
+            return Response(
+                'Рецепт уже в избранном',
+                status=HTTPStatus.BAD_REQUEST
+            )
         Favorite.objects.create(user=self.request.user, recipe=recipe)
-        serializer = RecipeShortSerializer(recipe, many=False)
+        serializer = RecipeShortSerializer(
+            recipe, many=False, context=self.get_serializer_context()
+        )
         return Response(data=serializer.data, status=HTTPStatus.CREATED)
 
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
+        lock_user(request.user.pk)
         recipe_id = self.kwargs.get('recipe_id')
-        recipe = get_object_or_404(Recipe, id=recipe_id)
         get_object_or_404(
             Favorite,
             user=self.request.user,
-            recipe=recipe
+            recipe_id=recipe_id
         ).delete()
         return Response(status=HTTPStatus.NO_CONTENT)
 
@@ -92,14 +135,29 @@ class UserViewSet(viewsets.ModelViewSet):
     pagination_class = PageWithLimitPagination
 
 
-class SubscribeViewSet(CreateListDestroyViewSet):
+class SubscribeViewSet(StatementTimeoutMixin, CreateListDestroyViewSet):
+    statement_timeout = settings.API_STATEMENT_TIMEOUT
     serializer_class = SubscribeSerializer
     permission_classes = (permissions.IsAuthenticated,)
     pagination_class = PageWithLimitPagination
 
     def get_queryset(self):
-        return Subscribe.objects.filter(user=self.request.user)
+        recent_recipes = Recipe.objects.filter(
+            pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:get_recipes_limit(self.request)]
+            )
+        )
+        return Subscribe.objects.filter(
+            user=self.request.user
+        ).select_related('author').prefetch_related(Prefetch(
+            'author__recipe_author',
+            queryset=recent_recipes,
+            to_attr='limited_recipes',
+        ))
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         author_id = self.kwargs.get('author_id')
         author = get_object_or_404(User, id=author_id)
@@ -108,27 +166,27 @@ class SubscribeViewSet(CreateListDestroyViewSet):
                 'Нельзя подписаться на себя',
                 status=HTTPStatus.BAD_REQUEST
             )
-        try:
-            Subscribe.objects.create(author=author, user=self.request.user)
-        except IntegrityError:
+        if lock_user(request.user.pk, Subscribe.objects.filter(
+                author=author, user=request.user)):
             return Response(
                 'Вы уже подписаны на данного автора',
                 status=HTTPStatus.BAD_REQUEST
             )
-        subscription = get_object_or_404(
-            Subscribe,
-            author=author,
-            user=self.request.user
+        subscription = Subscribe.objects.create(
+            author=author, user=self.request.user
+        )
+        serializer = SubscribeSerializer(
+            subscription, many=False, context=self.get_serializer_context()
         )
-        serializer = SubscribeSerializer(subscription, many=False)
         return Response(data=serializer.data, status=HTTPStatus.CREATED)
 
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
+        lock_user(request.user.pk)
         author_id = self.kwargs.get('author_id')
-        author = get_object_or_404(User, id=author_id)
         get_object_or_404(
             Subscribe,
-            author=author,
+            author_id=author_id,
             user=self.request.user
         ).delete()
         return Response(status=HTTPStatus.NO_CONTENT)
@@ -141,70 +199,165 @@ class CartViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Shoppingcart.objects.filter(user=self.request.user)
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         recipe_id = self.kwargs.get('recipe_id')
         recipe = get_object_or_404(Recipe, id=recipe_id)
-        try:
-            Shoppingcart.objects.create(user=self.request.user, recipe=recipe)
-        except IntegrityError:
+        if lock_user(request.user.pk, Shoppingcart.objects.filter(
+                user=request.user, recipe=recipe)):
             return Response(
                 'Этот рецепт уже в списке покупок',
                 status=HTTPStatus.BAD_REQUEST
             )
-        serializer = RecipeCartSerializer(recipe, many=False)
+        Shoppingcart.objects.create(user=self.request.user, recipe=recipe)
+        serializer = RecipeCartSerializer(
+            recipe, many=False, context=self.get_serializer_context()
+        )
         return Response(data=serializer.data, status=HTTPStatus.CREATED)
 
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
+        lock_user(request.user.pk)
         recipe_id = self.kwargs.get('recipe_id')
-        recipe = get_object_or_404(Recipe, id=recipe_id)
         get_object_or_404(
             Shoppingcart,
             user=self.request.user,
-            recipe=recipe
+            recipe_id=recipe_id
         ).delete()
         return Response(status=HTTPStatus.NO_CONTENT)
 
 
-class DownloadShoppingCartViewSet(APIView):
+class DownloadShoppingCartViewSet(StatementTimeoutMixin, APIView):
+    statement_timeout = settings.API_STATEMENT_TIMEOUT
     permission_classes = (permissions.IsAuthenticated,)
+    renderer_classes = (
+        PDFRenderer, CSVRenderer, PlainTextRenderer, JSONRenderer
+    )
 
-    @staticmethod
-    def canvas_method(dictionary):
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename = "cart.pdf"'
-        begin_position_x, begin_position_y = 40, 650
-        sheet = canvas.Canvas(response, pagesize=A4)
-        pdfmetrics.registerFont(
-            TTFont('FreeSans', 'data/FreeSans.ttf')
+    def get(self, request):
+        rows = list(get_cart_items(request.user))
+        renderer = request.accepted_renderer
+        filename = f'cart.{renderer.format}'
+        if renderer.format == PDFRenderer.format:
+            return FileResponse(
+                BytesIO(get_cart_pdf(request.user, rows)),
+                as_attachment=True,
+                filename=filename,
+                content_type=renderer.media_type,
+            )
+        return StreamingHttpResponse(
+            EXPORTERS[renderer.format](rows),
+            content_type=f'{renderer.media_type}; charset=utf-8',
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"'
+            },
         )
-        sheet.setFont('FreeSans', 36)
-        sheet.setTitle('Список покупок')
-        sheet.drawString(
-            begin_position_x,
-            begin_position_y + 40,
-            'Список покупок: '
+
+
+class ShoppingListViewSet(ListViewSet):
+    serializer_class = ShoppingListItemSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = None
+
+    def get_queryset(self):
+        return ShoppingListItem.objects.filter(
+            user=self.request.user
+        ).select_related('ingredient').order_by('ingredient__name')
+
+
+class PantryViewSet(ListViewSet):
+    serializer_class = PantryRecipeSerializer
+    pagination_class = PageWithLimitPagination
+    permission_classes = (permissions.AllowAny,)
+    throttle_classes = (ScopedRateThrottle,)
+    throttle_scope = 'pantry'
+
+    def get_pantry(self):
+        values = [
+            value
+            for param in self.request.query_params.getlist('ingredients')
+            for value in param.split(',') if value
+        ]
+        try:
+            pantry = {int(value) for value in values}
+        except ValueError:
+            raise ValidationError(
+                {'ingredients': 'Укажите id ингредиентов числами'}
+            )
+        if not pantry:
+            raise ValidationError(
+                {'ingredients': 'Укажите хотя бы один ингредиент'}
+            )
+        if len(pantry) > settings.PANTRY_MAX_INGREDIENTS:
+            raise ValidationError({'ingredients': (
+                'Можно указать не больше '
+                f'{settings.PANTRY_MAX_INGREDIENTS} ингредиентов'
+            )})
+        return pantry
+
+    def list(self, request, *args, **kwargs):
+        self.pantry = self.get_pantry()
+        page = self.paginate_queryset(pantry_index.match(self.pantry))
+        recipes = Recipe.objects.with_related(request.user).in_bulk(
+            [match.recipe_id for match in page]
         )
-        sheet.setFont('FreeSans', 20)
-        for number, item in enumerate(dictionary, start=1):
-            if begin_position_y < 100:
-                begin_position_y = 700
-                sheet.showPage()
-                sheet.setFont('FreeSans', 20)
-            sheet.drawString(
-                begin_position_x,
-                begin_position_y,
-                f'{number}.  {item["ingredient__name"]} - '
-                f'{item["ingredient_total"]}'
-                f' {item["ingredient__measurement_unit"]}'
+        found = []
+        for match in page:
+            recipe = recipes.get(match.recipe_id)
+            if recipe is not None:
+                recipe.match = match
+                found.append(recipe)
+        serializer = self.get_serializer(found, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'pantry': self.pantry}
+
+
+class FeedViewSet(ListViewSet):
+    serializer_class = RecipeSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        user = request.user
+        recipes = Recipe.objects.with_related(user)
+        if feed.uses_timeline(feed.get_following_count(user.pk)):
+            entries = self.paginate_queryset(feed.get_timeline(user))
+            loaded = recipes.in_bulk([entry.recipe_id for entry in entries])
+            page = [
+                loaded[entry.recipe_id] for entry in entries
+                if entry.recipe_id in loaded
+            ]
+        else:
+            page = self.paginate_queryset(
+                recipes.filter(author__following__user=user)
             )
-            begin_position_y -= 30
-        sheet.showPage()
-        sheet.save()
-        return response
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-    def get(self, request):
-        result = RecipeIngredient.objects.filter(
-            recipe__cartrecipe__user=request.user).values(
-            'ingredient__name', 'ingredient__measurement_unit').order_by(
-                'ingredient__name').annotate(ingredient_total=Sum('amount'))
-        return self.canvas_method(result)
+
+class BatchViewSet(viewsets.GenericViewSet):
+    serializer_class = BatchSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    batch_class = None
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = self.batch_class(request.user).apply(
+            **serializer.validated_data
+        )
+        return Response({'results': results})
+
+
+class FavoriteBatchViewSet(BatchViewSet):
+    batch_class = FavoriteBatch
+
+
+class CartBatchViewSet(BatchViewSet):
+    batch_class = CartBatch
+
+
+class SubscribeBatchViewSet(BatchViewSet):
+    batch_class = SubscriptionBatch
@@ -0,0 +1,9 @@
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+# Persistent connections leak under ASGI (Django ticket #33497).
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+application = get_asgi_application()
@@ -0,0 +1,75 @@
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import pool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    def __init__(self, min_size, max_size, conn_params):
+        self.connections = pool.ThreadedConnectionPool(
+            min_size, max_size, **conn_params
+        )
+        self.slots = threading.BoundedSemaphore(max_size)
+
+    def getconn(self, timeout):
+        if not self.slots.acquire(timeout=timeout):
+            return None
+        try:
+            connection = self.connections.getconn()
+            if connection.closed:
+                self.connections.putconn(connection, close=True)
+                connection = self.connections.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+        return connection
+
+    def putconn(self, connection, close):
+        try:
+            self.connections.putconn(connection, close=close)
+        finally:
+            self.slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pooled = False
+
+    def get_pool(self, conn_params):
+        with pools_lock:
+            if self.alias not in pools:
+                pools[self.alias] = ConnectionPool(
+                    self.settings_dict.get('POOL_MIN_SIZE', 1),
+                    self.settings_dict.get('POOL_MAX_SIZE', 10),
+                    conn_params,
+                )
+            return pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool(conn_params).getconn(
+            self.settings_dict.get('POOL_TIMEOUT', 5)
+        )
+        self.pooled = connection is not None
+        if not self.pooled:
+            return super().get_new_connection(conn_params)
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        base.psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self.pooled:
+            super()._close()
+            return
+        with self.wrap_database_errors:
+            pools[self.alias].putconn(
+                self.connection, close=self.errors_occurred
+            )
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +60,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASGI_APPLICATION = 'foodgram.asgi.application'
+
+ASYNC_VIEWS = bool(int(os.getenv('ASYNC_VIEWS', default=0)))
+
 '''
 DATABASES = {
     'default': {
@@ -74,7 +79,40 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'OPTIONS': {},
+        'POOL_MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', default=1)),
+        'POOL_MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+        'POOL_TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', default=5)),
+    }
+}
+
+POSTGRES_ENGINES = ('django.db.backends.postgresql', 'foodgram.db.pool')
+
+DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', default=0))
+
+if (DB_STATEMENT_TIMEOUT
+        and DATABASES['default']['ENGINE'] in POSTGRES_ENGINES):
+    DATABASES['default']['OPTIONS']['options'] = (
+        f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'
+    )
+
+DB_CONN_HEALTH_CHECKS = bool(
+    int(os.getenv('DB_CONN_HEALTH_CHECKS', default=1))
+)
+
+DB_CONN_HEALTH_CHECK_IDLE = int(
+    os.getenv('DB_CONN_HEALTH_CHECK_IDLE', default=30)
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
     }
 }
 
@@ -117,16 +155,127 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 IT_IS_EMPTY = '--пусто--'
 
+IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', default=2))
+
+ASYNC_VIEW_WORKERS = int(os.getenv('ASYNC_VIEW_WORKERS', default=10))
+
+CATALOGUE_CACHE_ALIAS = os.getenv('CATALOGUE_CACHE_ALIAS', default='default')
+
+CATALOGUE_CACHE_LOCAL_SIZE = int(
+    os.getenv('CATALOGUE_CACHE_LOCAL_SIZE', default=256)
+)
+
+CATALOGUE_CACHE_TIMEOUT = int(
+    os.getenv('CATALOGUE_CACHE_TIMEOUT', default=60 * 60)
+)
+
+CATALOGUE_CACHE_LOCAL_TIMEOUT = int(
+    os.getenv('CATALOGUE_CACHE_LOCAL_TIMEOUT', default=5)
+)
+
+RECIPES_LIMIT_DEFAULT = int(os.getenv('RECIPES_LIMIT_DEFAULT', default=3))
+
+RECIPES_LIMIT_MAX = int(os.getenv('RECIPES_LIMIT_MAX', default=30))
+
+INGREDIENT_SEARCH_LIMIT = int(
+    os.getenv('INGREDIENT_SEARCH_LIMIT', default=50)
+)
+
+INGREDIENT_SEARCH_SIMILARITY = float(
+    os.getenv('INGREDIENT_SEARCH_SIMILARITY', default=0.3)
+)
+
+INGREDIENT_INDEX_LOCAL_TIMEOUT = int(
+    os.getenv('INGREDIENT_INDEX_LOCAL_TIMEOUT', default=60)
+)
+
+PANTRY_MAX_INGREDIENTS = int(os.getenv('PANTRY_MAX_INGREDIENTS', default=30))
+
+PANTRY_INDEX_MAX_CHANGES = int(
+    os.getenv('PANTRY_INDEX_MAX_CHANGES', default=1000)
+)
+
+PANTRY_INDEX_CHANGES_TIMEOUT = int(
+    os.getenv('PANTRY_INDEX_CHANGES_TIMEOUT', default=60 * 60)
+)
+
+PANTRY_INDEX_LOCAL_TIMEOUT = int(
+    os.getenv('PANTRY_INDEX_LOCAL_TIMEOUT', default=60)
+)
+
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', default=100))
+
+FEED_FANOUT_THRESHOLD = int(os.getenv('FEED_FANOUT_THRESHOLD', default=50))
+
+AUTH_CACHE_ALIAS = os.getenv('AUTH_CACHE_ALIAS', default='')
+
+AUTH_CACHE_LOCAL_SIZE = int(os.getenv('AUTH_CACHE_LOCAL_SIZE', default=1024))
+
+AUTH_CACHE_TIMEOUT = int(os.getenv('AUTH_CACHE_TIMEOUT', default=60))
+
+SQL_INSTRUMENTATION = bool(int(os.getenv('SQL_INSTRUMENTATION', default=1)))
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', default=100))
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', default=5))
+
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', default=20))
+
+# Views with StatementTimeoutMixin spend two extra queries on PostgreSQL.
+QUERY_BUDGETS = {
+    'RecipeViewSet.list': 10,
+    'RecipeViewSet.retrieve': 8,
+    'SubscribeViewSet.list': 8,
+    'UserViewSet.list': 5,
+    'TagViewSet.list': 2,
+    'IngredientViewSet.list': 2,
+    'PantryViewSet.list': 8,
+    'FeedViewSet.list': 7,
+    'FavoriteBatchViewSet.create': 10,
+    'CartBatchViewSet.create': 12,
+    'SubscribeBatchViewSet.create': 12,
+    'DownloadShoppingCartViewSet.get': 6,
+}
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+
+API_STATEMENT_TIMEOUT = int(os.getenv('API_STATEMENT_TIMEOUT', default=5000))
+
+SHOPPING_CART_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_CART_CACHE_TIMEOUT', default=60 * 60 * 24)
+)
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageWithLimitPagination',
+
+    'DEFAULT_THROTTLE_RATES': {
+        'pantry': os.getenv('PANTRY_THROTTLE_RATE', default='60/minute'),
+    },
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram.sql': {
+            'handlers': ('console',),
+            'level': os.getenv('SQL_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
 }
 
 DJOSER = {
@@ -2,7 +2,8 @@ from django.conf import settings as s
 from django.contrib import admin
 
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient, RecipeTag,
-                     Shoppingcart, Tag)
+                     Shoppingcart, ShoppingListItem, Tag, TimelineEntry)
+from .search import search_recipes
 
 
 @admin.register(Tag)
@@ -34,11 +35,16 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = (RecipeTagInLine, RecipeIngredientInLine,)
     list_display = (
         'id', 'author', 'name', 'image', 'text',
-        'cooking_time',
+        'cooking_time', 'favorites_count',
     )
     search_fields = ('name',)
     empty_value_display = s.IT_IS_EMPTY
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_recipes(queryset, search_term), False
+
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
@@ -52,3 +58,17 @@ class ShoppingcartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     search_fields = ('user',)
     empty_value_display = s.IT_IS_EMPTY
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'ingredient', 'amount')
+    search_fields = ('user',)
+    empty_value_display = s.IT_IS_EMPTY
+
+
+@admin.register(TimelineEntry)
+class TimelineEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'recipe', 'pub_date')
+    search_fields = ('user',)
+    empty_value_display = s.IT_IS_EMPTY
@@ -0,0 +1,46 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+class CounterFieldsMixin:
+    counter_fields = ()
+    background_fields = ()
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None and not self._state.adding:
+            skipped = {
+                *self.counter_fields,
+                *self.background_fields,
+                *self.get_deferred_fields(),
+            }
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in skipped
+                and field.attname not in skipped
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+def change_counter(queryset, field, delta):
+    return queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        0,
+    )
+
+
+def reconcile_counter(queryset, field, actual):
+    drifted = queryset.annotate(actual=actual).exclude(**{field: F('actual')})
+    return queryset.filter(
+        pk__in=drifted.values('pk')
+    ).update(**{field: actual})
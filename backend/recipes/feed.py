@@ -0,0 +1,81 @@
+from django.conf import settings
+from users.models import Subscribe, User
+
+from .models import Recipe, TimelineEntry
+
+BATCH_SIZE = 1000
+
+
+def uses_timeline(following_count):
+    return following_count >= settings.FEED_FANOUT_THRESHOLD
+
+
+def get_following_count(user_id):
+    return User.objects.filter(pk=user_id).values_list(
+        'following_count', flat=True
+    ).first() or 0
+
+
+def add_entries(rows):
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, recipe_id=recipe_id,
+                          pub_date=pub_date)
+            for user_id, recipe_id, pub_date in rows
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def publish(recipe):
+    add_entries(
+        (user_id, recipe.pk, recipe.pub_date)
+        for user_id in Subscribe.objects.filter(
+            author_id=recipe.author_id,
+            user__following_count__gte=settings.FEED_FANOUT_THRESHOLD,
+        ).values_list('user_id', flat=True)
+    )
+
+
+def follow(user_id, author_ids):
+    following_count = get_following_count(user_id)
+    if not uses_timeline(following_count):
+        return
+    if not uses_timeline(following_count - len(author_ids)):
+        rebuild(User.objects.filter(pk=user_id))
+        return
+    add_entries(
+        (user_id, recipe_id, pub_date)
+        for recipe_id, pub_date in Recipe.objects.filter(
+            author_id__in=author_ids
+        ).values_list('pk', 'pub_date').iterator()
+    )
+
+
+def unfollow(user_id, author_ids):
+    entries = TimelineEntry.objects.filter(user_id=user_id)
+    if uses_timeline(get_following_count(user_id)):
+        entries = entries.filter(recipe__author_id__in=author_ids)
+    entries.delete()
+
+
+def rebuild(users=None):
+    entries = TimelineEntry.objects.all()
+    subscriptions = Subscribe.objects.filter(
+        user__following_count__gte=settings.FEED_FANOUT_THRESHOLD,
+        author__recipe_author__isnull=False,
+    )
+    if users is not None:
+        entries = entries.filter(user__in=users)
+        subscriptions = subscriptions.filter(user__in=users)
+    entries.delete()
+    add_entries(subscriptions.values_list(
+        'user_id', 'author__recipe_author', 'author__recipe_author__pub_date'
+    ).order_by().iterator())
+
+
+def get_timeline(user):
+    return TimelineEntry.objects.filter(user=user).only(
+        'recipe_id', 'pub_date'
+    ).order_by('-pub_date', '-recipe_id')
@@ -0,0 +1,22 @@
+from django.db import models
+from django.db.models import FloatField, Func, Lookup
+
+
+class FullTextField(models.TextField):
+    pass
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class Rank(Func):
+    function = 'bm25'
+    template = '-%(function)s(%(expressions)s)'
+    output_field = FloatField()
@@ -0,0 +1,101 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image
+
+VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280),
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANTS_DIR = 'variants'
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_VARIANT_WORKERS,
+    thread_name_prefix='recipe-images',
+)
+
+
+def variant_path(image_name, variant, extension):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return os.path.join(VARIANTS_DIR, f'{stem}_{variant}.{extension}')
+
+
+def render_variant(image, size, image_format, options):
+    variant = image.copy()
+    variant.thumbnail(size, Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    variant.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def build_variants(image_name):
+    with default_storage.open(image_name) as source:
+        image = Image.open(source)
+        image.load()
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    variants = {'source': image_name}
+    for variant, size in VARIANTS.items():
+        variants[variant] = {}
+        for extension, (image_format, options) in FORMATS.items():
+            path = variant_path(image_name, variant, extension)
+            default_storage.delete(path)
+            variants[variant][extension] = default_storage.save(
+                path, render_variant(image, size, image_format, options)
+            )
+    return variants
+
+
+def delete_variants(variants):
+    for variant in VARIANTS:
+        for path in variants.get(variant, {}).values():
+            default_storage.delete(path)
+
+
+def process_recipe_image(recipe_id, image_name):
+    from .models import Recipe
+
+    close_old_connections()
+    try:
+        previous = Recipe.objects.filter(
+            pk=recipe_id
+        ).values_list('image_variants', flat=True).first()
+        if Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+            image_variants=build_variants(image_name)
+        ) and previous and previous.get('source') != image_name:
+            delete_variants(previous)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(recipe):
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: executor.submit(process_recipe_image, recipe_id, image_name)
+    )
+
+
+def variant_urls(recipe, request=None):
+    urls = {}
+    for variant in VARIANTS:
+        paths = recipe.image_variants.get(variant)
+        if not paths:
+            continue
+        urls[variant] = {
+            extension: (
+                request.build_absolute_uri(default_storage.url(path))
+                if request else default_storage.url(path)
+            )
+            for extension, path in paths.items()
+        }
+    return urls
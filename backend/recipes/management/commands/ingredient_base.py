@@ -1,21 +1,145 @@
+import csv
 import json
+import os
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from recipes.models import Ingredient
+from recipes.signals import ingredients_imported
+
+DEFAULT_PATH = os.path.join(settings.BASE_DIR, 'data', 'ingredients.json')
+READ_SIZE = 64 * 1024
+SEPARATORS = ' \t\r\n,'
+
+
+def read_array_start(file):
+    buffer = ''
+    while not buffer.strip():
+        chunk = file.read(READ_SIZE)
+        if not chunk:
+            raise CommandError('Пустой JSON-файл')
+        buffer += chunk
+    buffer = buffer.lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидался JSON-массив ингредиентов')
+    return buffer[1:]
+
+
+def iter_json(file):
+    decoder = json.JSONDecoder()
+    buffer = read_array_start(file)
+    position = 0
+    while True:
+        while position < len(buffer) and buffer[position] in SEPARATORS:
+            position += 1
+        if buffer[position:position + 1] == ']':
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except ValueError:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise CommandError('Некорректный JSON')
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+
+
+def iter_csv(file):
+    yield from csv.DictReader(file)
+
+
+READERS = {
+    'json': iter_json,
+    'csv': iter_csv,
+}
 
 
 class Command(BaseCommand):
+    help = 'Загружает ингредиенты из JSON или CSV без дублей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+        parser.add_argument('--format', choices=READERS.keys())
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
     def handle(self, *args, **options):
-        ingredients_file = open(
-            'data/ingredients.json',
-            encoding='utf-8'
+        path = options['path']
+        file_format = (
+            options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        )
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        with open(path, encoding='utf-8', newline='') as file:
+            keys = self.iter_keys(READERS[file_format](file))
+            if options['dry_run']:
+                self.diff(keys)
+            else:
+                self.load(keys, options['batch_size'])
+
+    def iter_keys(self, items):
+        for item in items:
+            try:
+                name = item['name'].strip()
+                measurement_unit = item['measurement_unit'].strip()
+            except (KeyError, AttributeError, TypeError):
+                raise CommandError(f'Некорректная строка: {item}')
+            if name and measurement_unit:
+                yield name, measurement_unit
+
+    def load(self, keys, batch_size):
+        started = time.perf_counter()
+        processed = 0
+        with transaction.atomic():
+            before = Ingredient.objects.count()
+            while True:
+                batch = dict.fromkeys(islice(keys, batch_size))
+                if not batch:
+                    break
+                Ingredient.objects.bulk_create(
+                    (
+                        Ingredient(name=name, measurement_unit=unit)
+                        for name, unit in batch
+                    ),
+                    ignore_conflicts=True,
+                )
+                processed += len(batch)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Обработано {processed} строк '
+                    f'({processed / elapsed:.0f} строк/с)'
+                )
+            created = Ingredient.objects.count() - before
+        ingredients_imported.send(sender=Ingredient)
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено {created}, пропущено {processed - created} '
+            f'за {time.perf_counter() - started:.2f} с'
+        ))
+
+    def diff(self, keys):
+        existing = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
         )
-        ingredients_str = ingredients_file.read()
-        ingredients_data = json.loads(ingredients_str)
-        for ingredient in ingredients_data:
-            name = ingredient['name']
-            measurement_unit = ingredient['measurement_unit']
-            Ingredient.objects.create(
-                name=name,
-                measurement_unit=measurement_unit
-            )
+        seen = set()
+        new = []
+        duplicates = 0
+        for key in keys:
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            if key not in existing:
+                new.append(key)
+        for name, unit in new[:20]:
+            self.stdout.write(f'+ {name} ({unit})')
+        if len(new) > 20:
+            self.stdout.write(f'... и ещё {len(new) - 20}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Будет добавлено {len(new)}, уже в базе {len(seen) - len(new)}, '
+            f'повторов в файле {duplicates}, '
+            f'только в базе {len(existing - seen)}'
+        ))
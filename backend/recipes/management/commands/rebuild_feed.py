@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes import feed
+from recipes.models import TimelineEntry
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает предрассчитанные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        users = (
+            User.objects.filter(id__in=options['user_ids'])
+            if options['user_ids'] else None
+        )
+        with transaction.atomic():
+            feed.rebuild(users)
+        entries = TimelineEntry.objects.all()
+        if users is not None:
+            entries = entries.filter(user__in=users)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах подписок: {entries.count()}'
+        ))
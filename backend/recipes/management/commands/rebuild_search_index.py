@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes import search
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('recipe_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['recipe_ids']:
+                search.update_recipes(options['recipe_ids'])
+            else:
+                search.rebuild()
+        count = (
+            len(options['recipe_ids']) if options['recipe_ids']
+            else Recipe.objects.count()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов в поисковом индексе обновлено: {count}'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes import shopping_list
+from recipes.models import ShoppingListItem
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает списки покупок из корзин пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        users = (
+            User.objects.filter(id__in=options['user_ids'])
+            if options['user_ids'] else None
+        )
+        with transaction.atomic():
+            shopping_list.rebuild(users)
+        items = ShoppingListItem.objects.all()
+        if users is not None:
+            items = items.filter(user__in=users)
+        self.stdout.write(self.style.SUCCESS(
+            f'Позиций в списках покупок: {items.count()}'
+        ))
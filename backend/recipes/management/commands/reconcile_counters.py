@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.counters import count_subquery, reconcile_counter
+from recipes.models import Favorite, Recipe, Shoppingcart
+from users.models import Subscribe, User
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'cart_count', Shoppingcart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Subscribe, 'author'),
+    (User, 'following_count', Subscribe, 'user'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики'
+
+    def handle(self, *args, **options):
+        for model, field, related_model, related_field in COUNTERS:
+            with transaction.atomic():
+                fixed = reconcile_counter(
+                    model.objects.all(),
+                    field,
+                    count_subquery(related_model, related_field),
+                )
+            self.stdout.write(
+                f'{model.__name__}.{field}: исправлено {fixed}'
+            )
@@ -0,0 +1,85 @@
+# Generated by Django 3.2.9 on 2026-10-18 06:31
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FILL = """
+    UPDATE recipes_recipe SET search_vector =
+        setweight(to_tsvector('russian', name), 'A')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(recipes_ingredient.name, ' ')
+            FROM recipes_recipeingredient
+            JOIN recipes_ingredient
+                ON recipes_ingredient.id
+                = recipes_recipeingredient.ingredient_id
+            WHERE recipes_recipeingredient.recipe_id = recipes_recipe.id
+        ), '')), 'B')
+        || setweight(to_tsvector('russian', text), 'C')
+"""
+
+
+def normalize(value):
+    return value.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def fill_fts(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ingredients = {}
+    for recipe_id, name in RecipeIngredient.objects.values_list(
+            'recipe_id', 'ingredient__name').iterator():
+        ingredients.setdefault(recipe_id, []).append(name)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO recipes_recipe_fts (rowid, name, ingredients, text) '
+            'VALUES (%s, %s, %s, %s)',
+            [
+                (
+                    pk,
+                    normalize(name),
+                    normalize(' '.join(ingredients.get(pk, ()))),
+                    normalize(text),
+                )
+                for pk, name, text in Recipe.objects.values_list(
+                    'pk', 'name', 'text'
+                ).iterator()
+            ],
+        )
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_FILL)
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_vector_idx '
+            'ON recipes_recipe USING gin (search_vector)'
+        )
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5('
+            "name, ingredients, text, tokenize='unicode61 remove_diacritics 2')"
+        )
+        fill_fts(apps, schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS recipe_search_vector_idx')
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS recipes_recipe_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_shopping_list_item'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.9 on 2026-10-18 07:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+import recipes.fulltext
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_timeline_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSearchIndex',
+            fields=[
+                ('recipe', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('document', recipes.fulltext.FullTextField(db_column='recipes_recipe_fts', verbose_name='Документ')),
+            ],
+            options={
+                'verbose_name_plural': 'Поисковый индекс рецептов',
+                'db_table': 'recipes_recipe_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,7 +1,12 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
-from users.models import User
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from users.models import Subscribe, User
+
+from .counters import CounterFieldsMixin
+from .fulltext import FullTextField
 
 
 class Tag(models.Model):
@@ -40,12 +45,64 @@ class Ingredient(models.Model):
 
     class Meta:
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='ingredient_name_unit_unique'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('name',),
+                name='ingredient_name_prefix_idx',
+                opclasses=('varchar_pattern_ops',)
+            ),
+        ]
 
     def __str__(self):
         return self.name[:15]
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Shoppingcart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+
+    def with_related(self, user):
+        authors = User.objects.all()
+        if user.is_authenticated:
+            authors = authors.annotate(
+                is_subscribed=Exists(Subscribe.objects.filter(
+                    user=user, author=OuterRef('pk')
+                ))
+            )
+        return self.prefetch_related(
+            Prefetch('author', queryset=authors),
+            'tags',
+            Prefetch(
+                'recipe_ingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        ).with_user_flags(user)
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         verbose_name='автор',
@@ -57,6 +114,12 @@ class Recipe(models.Model):
         max_length=200,
     )
     image = models.ImageField('Картинка',)
+    image_variants = models.JSONField(
+        'Варианты картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField('Описание',)
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -77,34 +140,113 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата создания',
     )
+    favorites_count = models.PositiveIntegerField(
+        'В избранном',
+        default=0,
+        editable=False,
+    )
+    cart_count = models.PositiveIntegerField(
+        'В списках покупок',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeManager()
+
+    counter_fields = ('favorites_count', 'cart_count')
+    background_fields = ('image_variants', 'search_vector')
 
     class Meta:
         verbose_name_plural = 'Рецепты'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_newest_idx'
+            ),
+            models.Index(
+                fields=('-favorites_count', '-pub_date', '-id'),
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=('cooking_time', '-pub_date', '-id'),
+                name='recipe_fastest_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_newest_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name[:15]
 
 
+class RecipeSearchIndex(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_index',
+    )
+    document = FullTextField(
+        'Документ',
+        db_column='recipes_recipe_fts',
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'recipes_recipe_fts'
+        verbose_name_plural = 'Поисковый индекс рецептов'
+
+    def __str__(self):
+        return str(self.recipe_id)
+
+
 class RecipeTag(models.Model):
     tag = models.ForeignKey(
         Tag,
         verbose_name='тэг рецепта',
         on_delete=models.CASCADE,
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
         verbose_name='Рецепт',
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipe', 'tag'),
+                name='recipe_tag_unique'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('tag', 'recipe'),
+                name='recipe_tag_tag_idx'
+            ),
+        ]
+
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         verbose_name='Рецепт',
-        related_name='recipe_ingredient'
+        related_name='recipe_ingredient',
+        db_index=False,
     )
     ingredient = models.ForeignKey(
         Ingredient,
@@ -132,6 +274,7 @@ class Shoppingcart(models.Model):
         User,
         on_delete=models.CASCADE,
         verbose_name='Автор списка',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -159,6 +302,7 @@ class Favorite(models.Model):
         User,
         verbose_name='Пользователь',
         on_delete=models.CASCADE,
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -178,3 +322,73 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f'{self.user} likes {self.recipe}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='shopping_list',
+        db_index=False,
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент',
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='shopping_list_item_unique'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.ingredient} ({self.amount})'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='timeline',
+        db_index=False,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='timeline_entries',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата создания рецепта',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='timeline_entry_unique'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='timeline_user_newest_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} <- {self.recipe}'
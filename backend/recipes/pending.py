@@ -0,0 +1,27 @@
+from django.db import connection, transaction
+
+
+class PendingChanges:
+    def __init__(self, callback):
+        self.callback = callback
+        self.items = set()
+
+    def __call__(self):
+        self.callback(self.items)
+
+
+def collect_on_commit(callback, items):
+    items = set(items)
+    if not items:
+        return
+    if not connection.in_atomic_block:
+        callback(items)
+        return
+    pending_changes = getattr(connection, 'pending_changes', {})
+    pending = pending_changes.get(callback)
+    if pending is None or not any(
+            hook is pending for _, hook in connection.run_on_commit):
+        pending = pending_changes[callback] = PendingChanges(callback)
+        connection.pending_changes = pending_changes
+        transaction.on_commit(pending)
+    pending.items.update(items)
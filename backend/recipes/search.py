@@ -0,0 +1,124 @@
+import re
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery
+
+from .fulltext import Rank
+from .models import Recipe, RecipeIngredient, RecipeSearchIndex
+from .pending import collect_on_commit
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = RecipeSearchIndex._meta.db_table
+BATCH_SIZE = 1000
+WORD = re.compile(r'\w+')
+ENDINGS = 'аеиоуыэюяйь'
+
+
+def normalize(value):
+    return value.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def get_batches(recipe_ids):
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        yield recipe_ids[start:start + BATCH_SIZE]
+
+
+def update_vectors(recipe_ids):
+    ingredient_names = RecipeIngredient.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        search_vector=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(
+                Subquery(ingredient_names), weight='B', config=SEARCH_CONFIG
+            )
+            + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+        )
+    )
+
+
+def update_fts(recipe_ids):
+    rows = {
+        pk: (name, [], text)
+        for pk, name, text in Recipe.objects.filter(
+            pk__in=recipe_ids
+        ).values_list('pk', 'name', 'text')
+    }
+    for recipe_id, name in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids).values_list(
+                'recipe_id', 'ingredient__name'):
+        rows[recipe_id][1].append(name)
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+            recipe_ids,
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text) '
+            'VALUES (%s, %s, %s, %s)',
+            [
+                (
+                    pk,
+                    normalize(name),
+                    normalize(' '.join(ingredients)),
+                    normalize(text),
+                )
+                for pk, (name, ingredients, text) in rows.items()
+            ],
+        )
+
+
+def update_recipes(recipe_ids):
+    if connection.vendor == 'postgresql':
+        update = update_vectors
+    elif connection.vendor == 'sqlite':
+        update = update_fts
+    else:
+        return
+    for batch in get_batches(sorted(recipe_ids)):
+        update(batch)
+
+
+def schedule_update(recipe_ids):
+    collect_on_commit(update_recipes, recipe_ids)
+
+
+def rebuild():
+    update_recipes(Recipe.objects.values_list('pk', flat=True).iterator())
+
+
+def get_fts_query(value):
+    terms = []
+    for word in WORD.findall(normalize(value.lower())):
+        stem = word.rstrip(ENDINGS)
+        terms.append(f'"{stem if len(stem) >= 3 else word}"*')
+    return ' '.join(terms)
+
+
+def search_recipes(queryset, value):
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+    elif connection.vendor == 'sqlite':
+        query = get_fts_query(value)
+        if not query:
+            return queryset.none()
+        queryset = queryset.filter(
+            search_index__document__match=query
+        ).annotate(
+            search_rank=Rank('search_index__document', 10.0, 4.0, 1.0)
+        )
+    else:
+        return queryset.filter(name__icontains=value)
+    return queryset.order_by('-search_rank', '-pub_date', '-id')
@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import RecipeIngredient, Shoppingcart, ShoppingListItem
+
+
+def apply_deltas(user_ids, deltas):
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    user_ids = list(user_ids)
+    if not user_ids or not deltas:
+        return
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id)
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items() if delta > 0
+        ),
+        ignore_conflicts=True,
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas.keys()
+    )
+    items.update(amount=F('amount') + Case(
+        *(
+            When(ingredient_id=ingredient_id, then=Value(delta))
+            for ingredient_id, delta in deltas.items()
+        ),
+        output_field=IntegerField(),
+    ))
+    if min(deltas.values()) < 0:
+        items.filter(amount__lte=0).delete()
+
+
+def get_recipe_amounts(recipe_ids, sign=1):
+    amounts = defaultdict(int)
+    for ingredient_id, amount in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids).values_list('ingredient_id', 'amount'):
+        amounts[ingredient_id] += sign * amount
+    return amounts
+
+
+def add_recipes(user_id, recipe_ids):
+    apply_deltas((user_id,), get_recipe_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    apply_deltas((user_id,), get_recipe_amounts(recipe_ids, sign=-1))
+
+
+def change_recipe(recipe_id, deltas):
+    apply_deltas(
+        Shoppingcart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True),
+        deltas,
+    )
+
+
+def change_rows(removed=(), added=()):
+    changes = defaultdict(lambda: defaultdict(int))
+    for sign, rows in ((-1, removed), (1, added)):
+        for recipe_id, ingredient_id, amount in rows:
+            changes[recipe_id][ingredient_id] += sign * amount
+    for recipe_id, deltas in changes.items():
+        change_recipe(recipe_id, deltas)
+
+
+def rebuild(users=None):
+    items = ShoppingListItem.objects.all()
+    filters = {'recipe__cartrecipe__isnull': False}
+    if users is not None:
+        items = items.filter(user__in=users)
+        filters['recipe__cartrecipe__user__in'] = users
+    carts = RecipeIngredient.objects.filter(**filters)
+    items.delete()
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(**row)
+            for row in carts.values(
+                'ingredient_id', user_id=F('recipe__cartrecipe__user')
+            ).order_by().annotate(amount=Sum('amount')).iterator()
+        ),
+        batch_size=1000,
+    )
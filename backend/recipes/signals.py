@@ -0,0 +1,121 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from users.models import User
+
+from . import feed, search, shopping_list
+from .counters import change_counter
+from .images import delete_variants, schedule_variants
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     Shoppingcart)
+
+ingredients_imported = Signal()
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    Shoppingcart: 'cart_count',
+}
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    if (
+        instance.image
+        and instance.image_variants.get('source') != instance.image.name
+    ):
+        schedule_variants(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    delete_variants(instance.image_variants)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            User.objects.filter(pk=instance.author_id), 'recipes_count', 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_removed(sender, instance, **kwargs):
+    change_counter(
+        User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    if created:
+        feed.publish(instance)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Shoppingcart)
+def recipe_relation_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            RECIPE_COUNTERS[sender],
+            1,
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Shoppingcart)
+def recipe_relation_deleted(sender, instance, **kwargs):
+    change_counter(
+        Recipe.objects.filter(pk=instance.recipe_id),
+        RECIPE_COUNTERS[sender],
+        -1,
+    )
+
+
+@receiver(post_save, sender=Shoppingcart)
+def cart_recipe_added(sender, instance, created, **kwargs):
+    if created:
+        shopping_list.add_recipes(instance.user_id, (instance.recipe_id,))
+
+
+@receiver(post_delete, sender=Shoppingcart)
+def cart_recipe_removed(sender, instance, **kwargs):
+    shopping_list.remove_recipes(instance.user_id, (instance.recipe_id,))
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def recipe_ingredient_saving(sender, instance, **kwargs):
+    removed = ()
+    if instance.pk is not None:
+        removed = RecipeIngredient.objects.filter(
+            pk=instance.pk
+        ).values_list('recipe_id', 'ingredient_id', 'amount')
+    shopping_list.change_rows(
+        removed,
+        ((instance.recipe_id, instance.ingredient_id, instance.amount),),
+    )
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_removed(sender, instance, **kwargs):
+    shopping_list.change_rows(removed=(
+        (instance.recipe_id, instance.ingredient_id, instance.amount),
+    ))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_search_changed(sender, instance, **kwargs):
+    search.schedule_update((instance.pk,))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_search_changed(sender, instance, **kwargs):
+    search.schedule_update((instance.recipe_id,))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_search_changed(sender, instance, created, **kwargs):
+    if not created:
+        search.schedule_update(RecipeIngredient.objects.filter(
+            ingredient=instance
+        ).values_list('recipe_id', flat=True))
@@ -0,0 +1,37 @@
+from django.test import TestCase
+from recipes.models import Recipe
+from users.models import User
+
+
+class RecipeSaveTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            'author@foodgram.ru', 'author', 'password'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.author,
+            name='Блины',
+            image='recipes/pancakes.jpg',
+            text='Смешать и пожарить',
+            cooking_time=20,
+        )
+
+    def test_save_keeps_image_variants_written_after_load(self):
+        variants = {'source': 'recipes/pancakes.jpg', 'card': {}}
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        Recipe.objects.filter(pk=recipe.pk).update(image_variants=variants)
+        recipe.name = 'Оладьи'
+        recipe.save()
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        self.assertEqual(recipe.name, 'Оладьи')
+        self.assertEqual(recipe.image_variants, variants)
+
+    def test_save_keeps_counters_and_deferred_fields(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        Recipe.objects.filter(pk=recipe.pk).update(favorites_count=3)
+        recipe.cooking_time = 10
+        recipe.save()
+        self.assertIn('search_vector', recipe.get_deferred_fields())
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        self.assertEqual(recipe.cooking_time, 10)
+        self.assertEqual(recipe.favorites_count, 3)
@@ -0,0 +1,47 @@
+from django.test import TestCase
+from recipes import shopping_list
+from recipes.models import (Ingredient, Recipe, RecipeIngredient, Shoppingcart,
+                            ShoppingListItem)
+from users.models import User
+
+
+class RebuildTest(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                f'user{number}@foodgram.ru', f'user{number}', 'password'
+            )
+            for number in range(2)
+        ]
+        self.ingredient = Ingredient.objects.create(
+            name='Мука', measurement_unit='г'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.users[0],
+            name='Блины',
+            image='recipes/pancakes.jpg',
+            text='Смешать и пожарить',
+            cooking_time=20,
+        )
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.ingredient, amount=500
+        )
+        for user in self.users:
+            Shoppingcart.objects.create(user=user, recipe=self.recipe)
+
+    def get_amounts(self):
+        return dict(ShoppingListItem.objects.filter(
+            ingredient=self.ingredient
+        ).values_list('user_id', 'amount'))
+
+    def test_rebuild_user_with_shared_recipe(self):
+        ShoppingListItem.objects.all().delete()
+        shopping_list.rebuild(User.objects.filter(pk=self.users[0].pk))
+        self.assertEqual(self.get_amounts(), {self.users[0].pk: 500})
+
+    def test_rebuild_all_users_with_shared_recipe(self):
+        ShoppingListItem.objects.all().delete()
+        shopping_list.rebuild()
+        self.assertEqual(
+            self.get_amounts(), {user.pk: 500 for user in self.users}
+        )
@@ -0,0 +1,47 @@
+from fractions import Fraction
+
+LARGER_UNITS = {
+    'г': (('кг', 1000),),
+    'мл': (('л', 1000),),
+    'ч. л.': (('ст. л.', 3),),
+}
+ALIASES = {
+    'гр': 'г',
+    'гр.': 'г',
+    'г.': 'г',
+    'кг.': 'кг',
+    'мл.': 'мл',
+    'л.': 'л',
+    'ч.л.': 'ч. л.',
+    'ст.л.': 'ст. л.',
+}
+MAX_DECIMALS = 3
+
+UNITS = {
+    **{base: (base, 1) for base in LARGER_UNITS},
+    **{
+        unit: (base, factor)
+        for base, larger in LARGER_UNITS.items()
+        for unit, factor in larger
+    },
+}
+UNITS.update({alias: UNITS[unit] for alias, unit in ALIASES.items()})
+
+
+def to_base(unit, amount):
+    base, factor = UNITS.get(unit.strip().lower(), (unit, 1))
+    return base, amount * factor
+
+
+def to_number(value):
+    if value.denominator == 1:
+        return value.numerator
+    return float(value)
+
+
+def humanize(base, total):
+    for unit, factor in LARGER_UNITS.get(base, ()):
+        value = Fraction(total, factor)
+        if value >= 1 and (value * 10 ** MAX_DECIMALS).denominator == 1:
+            return unit, to_number(value)
+    return base, total
@@ -8,7 +8,8 @@ from .models import Subscribe, User
 class UserAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'username', 'email', 'first_name',
-        'last_name', 'is_superuser'
+        'last_name', 'is_superuser', 'recipes_count', 'subscribers_count',
+        'following_count',
     )
     search_fields = ('username', 'email',)
     empty_value_display = s.IT_IS_EMPTY
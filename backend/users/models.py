@@ -2,6 +2,7 @@ from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
+from recipes.counters import CounterFieldsMixin
 
 
 class UserManager(BaseUserManager):
@@ -26,7 +27,7 @@ class UserManager(BaseUserManager):
         return self.create_user(email, username, password, **extra_fields)
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(CounterFieldsMixin, AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(
         verbose_name='Электронная почта',
         max_length=254,
@@ -53,11 +54,28 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name='Права доступа',
         default=False
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Количество подписок',
+        default=0,
+        editable=False,
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'password',)
 
     objects = UserManager()
 
+    counter_fields = ('recipes_count', 'subscribers_count', 'following_count')
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
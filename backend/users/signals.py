@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes import feed
+from recipes.counters import change_counter
+
+from .models import Subscribe, User
+
+
+@receiver(post_save, sender=Subscribe)
+def subscribe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            User.objects.filter(pk=instance.author_id), 'subscribers_count', 1
+        )
+        change_counter(
+            User.objects.filter(pk=instance.user_id), 'following_count', 1
+        )
+        feed.follow(instance.user_id, (instance.author_id,))
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscribe_deleted(sender, instance, **kwargs):
+    change_counter(
+        User.objects.filter(pk=instance.author_id), 'subscribers_count', -1
+    )
+    change_counter(
+        User.objects.filter(pk=instance.user_id), 'following_count', -1
+    )
+    feed.unfollow(instance.user_id, (instance.author_id,))